@@ -1,61 +1,96 @@
-import os
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Annotated, List, Optional
 
-class Settings:
+from pydantic import field_validator
+from pydantic_settings import BaseSettings, NoDecode, SettingsConfigDict
+
+class Settings(BaseSettings):
     """Production-ready configuration settings"""
     
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_ignore_empty=True,
+        extra="ignore",
+        frozen=True
+    )
+    
     # Environment
-    ENV: str = os.getenv("ENV", "development")
-    DEBUG: bool = os.getenv("DEBUG", "true").lower() == "true"
+    ENV: str = "development"
+    DEBUG: bool = True
     
     # Server settings
-    HOST: str = os.getenv("HOST", "0.0.0.0")
-    PORT: int = int(os.getenv("PORT", "8000"))
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    WORKERS: int = 1
     
-    # CORS settings
-    CORS_ORIGINS: list = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
+    # CORS settings (comma-separated in the environment)
+    CORS_ORIGINS: Annotated[List[str], NoDecode] = ["http://localhost:3000"]
     
     # Storage settings
-    USE_S3: bool = os.getenv("USE_S3", "false").lower() == "true"
+    USE_S3: bool = False
     
     # S3 Configuration
-    AWS_ACCESS_KEY_ID: Optional[str] = os.getenv("AWS_ACCESS_KEY_ID")
-    AWS_SECRET_ACCESS_KEY: Optional[str] = os.getenv("AWS_SECRET_ACCESS_KEY")
-    AWS_REGION: str = os.getenv("AWS_REGION", "us-east-1")
-    S3_BUCKET: Optional[str] = os.getenv("S3_BUCKET")
-    S3_BUCKET_URL: Optional[str] = os.getenv("S3_BUCKET_URL")  # CloudFront URL if using CDN
+    AWS_ACCESS_KEY_ID: Optional[str] = None
+    AWS_SECRET_ACCESS_KEY: Optional[str] = None
+    AWS_REGION: str = "us-east-1"
+    S3_BUCKET: Optional[str] = None
+    S3_BUCKET_URL: Optional[str] = None  # CloudFront URL if using CDN
+    S3_MAX_CONCURRENCY: int = 10  # Clips uploaded in parallel per job
+    S3_UPLOAD_URL_EXPIRES: int = 900  # Seconds a presigned upload URL stays valid
     
     # Local storage (fallback)
-    LOCAL_OUTPUT_DIR: str = os.getenv("LOCAL_OUTPUT_DIR", str(Path(__file__).parent / "output_clips"))
+    LOCAL_OUTPUT_DIR: str = str(Path(__file__).parent / "output_clips")
+    # Internal nginx location mapped to LOCAL_OUTPUT_DIR; when set, /clips hands
+    # file transfers to nginx via X-Accel-Redirect instead of streaming them itself
+    CLIPS_ACCEL_REDIRECT_PREFIX: Optional[str] = None
     
     # Database (optional for advanced deployments)
-    DATABASE_URL: Optional[str] = os.getenv("DATABASE_URL")
+    DATABASE_URL: Optional[str] = None
+    
+    # Redis job store (used when DATABASE_URL is not set)
+    REDIS_URL: Optional[str] = None
+    
+    # In-memory job cache bounds
+    MAX_JOBS_CACHE: int = 10_000
+    JOB_TTL_SECONDS: int = 3600
+    JOB_ACTIVE_TTL_SECONDS: float = 1.0
     
     # API Keys
-    OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
+    OPENAI_API_KEY: Optional[str] = None
     
     # Security
-    SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
+    SECRET_KEY: str = "your-secret-key-change-in-production"
     
     # FFmpeg configuration
-    FFMPEG_PATH: Optional[str] = os.getenv("FFMPEG_PATH")
-    USE_SYSTEM_FFMPEG: bool = os.getenv("USE_SYSTEM_FFMPEG", "true").lower() == "true"
+    FFMPEG_PATH: Optional[str] = None
+    USE_SYSTEM_FFMPEG: bool = True
     
     # Rate limiting
-    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "false").lower() == "true"
-    MAX_JOBS_PER_USER: int = int(os.getenv("MAX_JOBS_PER_USER", "5"))
+    RATE_LIMIT_ENABLED: bool = False
+    MAX_JOBS_PER_USER: int = 5
+    
+    # Re-queue pending/processing jobs whose worker went away (lapsed job lease)
+    RECOVER_JOBS_ON_STARTUP: bool = True
     
     # Video processing limits
-    MAX_VIDEO_DURATION: int = int(os.getenv("MAX_VIDEO_DURATION", "3600"))  # 1 hour
-    MAX_CLIP_COUNT: int = int(os.getenv("MAX_CLIP_COUNT", "10"))
+    MAX_VIDEO_DURATION: int = 3600  # 1 hour
+    MAX_CLIP_COUNT: int = 10
     
     # YouTube Configuration
     YOUTUBE_COOKIES_CONTENT: Optional[str] = None
     
-    @property
+    @field_validator("CORS_ORIGINS", mode="before")
+    @classmethod
+    def split_cors_origins(cls, value):
+        """Accept a comma-separated list of origins"""
+        if isinstance(value, str):
+            return value.split(",")
+        return value
+    
+    @cached_property
     def base_url(self) -> str:
-        """Get the base URL for video serving"""
+        """Get the base URL for video serving (resolved once, settings are frozen)"""
         if self.USE_S3 and self.S3_BUCKET_URL:
             return self.S3_BUCKET_URL
         elif self.USE_S3 and self.S3_BUCKET:
@@ -68,5 +103,12 @@ class Settings:
         """Check if running in production"""
         return self.ENV.lower() == "production"
 
+
+@lru_cache
+def get_settings() -> Settings:
+    """Parse the environment once and reuse the settings object"""
+    return Settings()
+
+
 # Global settings instance
-settings = Settings() 
\ No newline at end of file
+settings = get_settings()
@@ -1,96 +1,256 @@
 import os
+import time
 import uuid
 import traceback
-import shutil
-import json
-from typing import Dict, Any
+import string
+import hashlib
+import logging
+import asyncio
+import functools
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
+from urllib.parse import quote
 
 # CRITICAL: Set FFmpeg environment variables BEFORE any video library imports
 # This prevents Santa restrictions on bundled FFmpeg binaries in Shopify environments
-system_ffmpeg = shutil.which('ffmpeg')
+from .video_processing import run_pipeline_job
+from .video_processing.ffmpeg import configure_ffmpeg_env, encode_workers, is_keyframe_aligned, keyframe_times, snap_to_keyframe, trim_command
+
+system_ffmpeg = configure_ffmpeg_env()
 if system_ffmpeg:
-    # Set all possible FFmpeg environment variables to force system usage
-    os.environ['USE_SYSTEM_FFMPEG'] = '1'
-    os.environ['IMAGEIO_FFMPEG_EXE'] = system_ffmpeg
-    os.environ['FFMPEG_BINARY'] = system_ffmpeg
-    os.environ['MOVIEPY_FFMPEG'] = system_ffmpeg
     print(f"🎬 Main app FFmpeg config: {system_ffmpeg}")
-elif os.path.exists('/opt/homebrew/bin/ffmpeg'):
-    ffmpeg_path = '/opt/homebrew/bin/ffmpeg'
-    os.environ['USE_SYSTEM_FFMPEG'] = '1'
-    os.environ['IMAGEIO_FFMPEG_EXE'] = ffmpeg_path
-    os.environ['FFMPEG_BINARY'] = ffmpeg_path
-    os.environ['MOVIEPY_FFMPEG'] = ffmpeg_path
-    print(f"🎬 Main app FFmpeg config: {ffmpeg_path}")
-elif os.path.exists('/usr/local/bin/ffmpeg'):
-    ffmpeg_path = '/usr/local/bin/ffmpeg'
-    os.environ['USE_SYSTEM_FFMPEG'] = '1'
-    os.environ['IMAGEIO_FFMPEG_EXE'] = ffmpeg_path
-    os.environ['FFMPEG_BINARY'] = ffmpeg_path
-    os.environ['MOVIEPY_FFMPEG'] = ffmpeg_path
-    print(f"🎬 Main app FFmpeg config: {ffmpeg_path}")
 else:
     print("⚠️ System FFmpeg not found - video processing may trigger Santa restrictions")
 
-from fastapi import FastAPI, BackgroundTasks, HTTPException, status
-from fastapi.staticfiles import StaticFiles
+import orjson
+from fastapi import FastAPI, HTTPException, Request, Response, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from fastapi.responses import FileResponse, ORJSONResponse, RedirectResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from .config import settings
-from .storage import job_manager, storage_backend
+from .storage import JOB_LEASE_SECONDS, UPLOADS_DIR, job_manager, link_or_copy, storage_backend
 from .schemas import (
     ProcessRequest, ProcessResponse, JobStatusResponse, ClipMetadata,
-    FinalizeRequest, FinalizeResponse, EditedClip,
+    FinalizeRequest, FinalizeResponse, FinalizeAcceptedResponse, EditedClip,
     GenerateCaptionsRequest, GenerateCaptionsResponse, CaptionSegment,
-    ApplyCaptionsRequest, ApplyCaptionsResponse, CaptionStyle
+    ApplyCaptionsRequest, ApplyCaptionsResponse, CaptionStyle,
+    UploadUrlRequest, UploadUrlResponse
 )
 
-# Import the video processing pipeline
-try:
-    from .video_processing import run_processing_pipeline
-    VIDEO_PROCESSOR_AVAILABLE = True
-    print("✅ Video processing pipeline loaded successfully")
-except ImportError as e:
-    VIDEO_PROCESSOR_AVAILABLE = False
-    print(f"❌ Video processing pipeline not available: {e}")
+logger = logging.getLogger(__name__)
+
+# Locate the video processing pipeline without importing it. The pipeline drags in
+# torch/whisper, so it is only imported when the first job actually runs.
+VIDEO_PROCESSOR_AVAILABLE = importlib.util.find_spec(".video_processing.pipeline", __package__) is not None
+if VIDEO_PROCESSOR_AVAILABLE:
+    print("✅ Video processing pipeline found (loaded on first job)")
+else:
+    print("❌ Video processing pipeline not available")
     print("Check backend/app/video_processing/ module")
 
-# Import caption processing
-try:
+
+# Caption processing is located the same way; transcribe pulls in whisper/torch,
+# so workers that only answer status polls never load it
+CAPTION_PROCESSOR_AVAILABLE = all(
+    importlib.util.find_spec(module, __package__) is not None
+    for module in (".video_processing.transcribe", ".video_processing.caption_burner")
+)
+if CAPTION_PROCESSOR_AVAILABLE:
+    print("✅ Caption processing found (loaded on first request)")
+else:
+    print("❌ Caption processing not available")
+
+
+@functools.lru_cache(maxsize=1)
+def _get_transcriber():
+    """Import the transcriber on first use"""
     from .video_processing.transcribe import transcribe_video
+    return transcribe_video
+
+
+@functools.lru_cache(maxsize=1)
+def _get_caption_burner():
+    """Import the caption burner on first use"""
     from .video_processing.caption_burner import apply_captions_to_video
-    CAPTION_PROCESSOR_AVAILABLE = True
-    print("✅ Caption processing loaded successfully")
-except ImportError as e:
-    CAPTION_PROCESSOR_AVAILABLE = False
-    print(f"❌ Caption processing not available: {e}")
+    return apply_captions_to_video
+
+
+async def _job_worker(queue: asyncio.Queue):
+    """Pull accepted jobs off the queue and run them one at a time"""
+    while True:
+        job_id, url, prompt = await queue.get()
+        try:
+            await process_video_background(job_id, url, prompt)
+        finally:
+            queue.task_done()
+
+
+# Finalizes run in the memory of the worker that accepted them, so one still marked
+# "processing" after this long was lost (e.g. to a restart) and no longer blocks a retry
+FINALIZE_STALE_SECONDS = 30 * 60
+
+
+def _finalize_running(job: Dict[str, Any]) -> bool:
+    """Whether a finalize of this job is in progress on some worker"""
+    if job.get("finalize_status") != "processing":
+        return False
+    return time.time() - job.get("finalize_started_at", 0) < FINALIZE_STALE_SECONDS
+
+
+async def _run_finalize(job_id: str, edited_clips: List[EditedClip], frame_accurate: bool = False):
+    """Finalize a job's edited clips and record the outcome for GET /finalize pollers"""
+    try:
+        job = await job_manager.load_job(job_id)
+        if not job:
+            print(f"❌ Finalize: Job {job_id} not found")
+            await job_manager.update_job(job_id, finalize_status="failed", finalize_message="Job not found")
+            return
+        result = await _finalize(job_id, job, edited_clips, frame_accurate)
+        await job_manager.update_job(job_id, finalize_status="success", finalize_message=result["message"])
+    except Exception as e:
+        logger.exception("❌ Finalization failed for job %s", job_id)
+        traceback.clear_frames(e.__traceback__)
+        await job_manager.update_job(
+            job_id,
+            finalize_status="failed",
+            finalize_message=f"Failed to finalize clips: {e!s}"[:MAX_ERROR_MESSAGE_LENGTH]
+        )
+
+
+async def _lease_keeper(queue: asyncio.Queue):
+    """Renew this worker's job leases and queue jobs whose worker went away"""
+    while True:
+        await job_manager.renew_leases()
+        if settings.RECOVER_JOBS_ON_STARTUP:
+            # Claims are atomic in the job store, so each lapsed job is picked up by one worker only
+            recovered = 0
+            for job_id, job in await job_manager.claim_unfinished_jobs():
+                if job.get("url") and job.get("prompt") is not None:
+                    queue.put_nowait((job_id, job["url"], job["prompt"]))
+                    recovered += 1
+            if recovered:
+                print(f"♻️ Re-queued {recovered} unfinished jobs")
+        await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+
+
+async def _finalize_worker(queue: asyncio.Queue):
+    """Run queued finalizations one at a time; each already trims its clips in parallel"""
+    while True:
+        job_id, edited_clips, frame_accurate = await queue.get()
+        try:
+            await _run_finalize(job_id, edited_clips, frame_accurate)
+        finally:
+            queue.task_done()
+
+
+def _create_pipeline_pool() -> ProcessPoolExecutor:
+    """Start the worker processes that run the pipeline"""
+    # The pipeline is CPU-bound (whisper/torch, ffmpeg), so it runs in worker
+    # processes to keep the event loop free for /status polling. "spawn" avoids
+    # forking a process that already holds threads and CUDA state.
+    return ProcessPoolExecutor(
+        max_workers=settings.MAX_JOBS_PER_USER,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the pipeline worker pool on startup and tear it down on shutdown"""
+    app.state.pool = _create_pipeline_pool()
+    print(f"⚙️ Pipeline process pool started with {settings.MAX_JOBS_PER_USER} workers")
+    
+    # Jobs are queued in memory but every accepted job is already in the job store,
+    # leased to the worker that queued it; jobs whose lease lapses (their worker was
+    # restarted or died) are picked up again by _lease_keeper. The number of queue
+    # workers caps how many jobs run the pipeline at once.
+    app.state.job_queue = asyncio.Queue()
+    workers = [
+        asyncio.create_task(_job_worker(app.state.job_queue))
+        for _ in range(settings.MAX_JOBS_PER_USER)
+    ]
+    app.state.finalize_queue = asyncio.Queue()
+    workers.append(asyncio.create_task(_finalize_worker(app.state.finalize_queue)))
+    # Probes for a hardware encoder, so it runs off the event loop
+    app.state.caption_slots = asyncio.Semaphore(await asyncio.to_thread(encode_workers))
+    workers.append(asyncio.create_task(_lease_keeper(app.state.job_queue)))
+    
+    yield
+    
+    for worker in workers:
+        worker.cancel()
+    app.state.pool.shutdown(wait=False, cancel_futures=True)
+
 
 app = FastAPI(
     title="YouTube to Shorts API",
     description="API for converting YouTube videos to short clips",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# Add CORS middleware
+# Add CORS middleware (origins as a frozenset: every request's Origin is checked with `in`)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.CORS_ORIGINS,
+    allow_origins=frozenset(origin.strip() for origin in settings.CORS_ORIGINS),
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
-# Setup local static file serving for clips (only if not using S3)
+# Clips are served by the /clips route below: local files go out through
+# FileResponse (or nginx, see CLIPS_ACCEL_REDIRECT_PREFIX), anything else is
+# redirected to S3/CloudFront when enabled
+output_dir = Path(settings.LOCAL_OUTPUT_DIR)
+output_dir.mkdir(exist_ok=True)
+output_dir_str = str(output_dir)
 if not settings.USE_S3:
-    output_dir = Path(settings.LOCAL_OUTPUT_DIR)
-    output_dir.mkdir(exist_ok=True)
-    app.mount("/clips", StaticFiles(directory=str(output_dir)), name="clips")
     print(f"📁 Local file serving enabled: {output_dir}")
 else:
     print(f"☁️ S3 storage enabled: {settings.S3_BUCKET}")
 
-print(f"🚀 Backend started with {len(job_manager.jobs)} existing jobs")
+# Fixed-detail errors are built once instead of per request (/status is polled hot);
+# raise them with .with_traceback(None) so a shared instance doesn't keep growing
+# its traceback chain on every raise
+_JOB_NOT_FOUND = HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+_PIPELINE_UNAVAILABLE = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Video processing pipeline is not available. Check that video_processing module exists and dependencies are installed."
+)
+_CAPTIONS_UNAVAILABLE = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Caption processing is not available"
+)
+
+
+def _strip_table(allowed: str) -> Dict[int, None]:
+    """str.translate table deleting every ASCII character not in `allowed`"""
+    keep = set(string.ascii_letters + string.digits + allowed)
+    return str.maketrans({c: None for c in map(chr, range(128)) if c not in keep})
+
+
+_FILENAME_TABLE = _strip_table(" -_")
+_CLIP_ID_TABLE = _strip_table("-_")
+
+
+def _sanitize(text: str, table: Dict[int, None], extra: str) -> str:
+    """Keep only alphanumerics and `extra`; ASCII input takes the C-level translate path"""
+    if text.isascii():
+        return text.translate(table)
+    return "".join(c for c in text if c.isalnum() or c in extra)
+
+
+def _mmss(seconds: float) -> str:
+    """Format seconds as MM:SS"""
+    return "%02d:%02d" % divmod(int(seconds), 60)
 
 
 def format_duration(seconds: float) -> str:
@@ -107,89 +267,151 @@ def format_duration(seconds: float) -> str:
         return f"{remaining_secs:.0f}s" if remaining_secs % 1 == 0 else f"{remaining_secs:.1f}s"
 
 
+def _format_clip_times(results: List[Dict[str, Any]]) -> None:
+    """Replace raw durations with display strings and add MM:SS start/end times, in one pass over the batch"""
+    for result in results:
+        result["duration"] = format_duration(result["duration"])
+        result["startTime"] = _mmss(result["start_time"])
+        result["endTime"] = _mmss(result["end_time"])
+
+
+def _read_metadata(metadata_path: Path) -> Optional[Dict[str, Any]]:
+    """Load the pipeline's metadata.json, or None if it wasn't written"""
+    try:
+        return orjson.loads(metadata_path.read_bytes())
+    except FileNotFoundError:
+        return None
+
+
+def _upload_if_exists(local_path: Path, job_id: str, subdir: str = "") -> Optional[str]:
+    """Upload one clip to storage and return its public URL (blocking)"""
+    if not local_path.exists():
+        return None
+    filename = f"{subdir}/{local_path.name}" if subdir else local_path.name
+    return job_manager.upload_video(str(local_path), job_id, filename)
+
+
+async def _upload_clips(job_id: str, local_paths: List[Path], subdir: str = "") -> List[Optional[str]]:
+    """Upload clips concurrently, at most S3_MAX_CONCURRENCY at a time, keeping input order"""
+    sem = asyncio.Semaphore(settings.S3_MAX_CONCURRENCY)
+    
+    async def upload(local_path: Path) -> Optional[str]:
+        async with sem:
+            return await asyncio.to_thread(_upload_if_exists, local_path, job_id, subdir)
+    
+    return await asyncio.gather(*(upload(path) for path in local_paths))
+
+
+async def _collect_results(job_id: str, output_paths: List[str]) -> Dict[str, Any]:
+    """Read the pipeline's metadata and upload clips, keeping blocking I/O off the loop"""
+    # Load metadata if available, otherwise fall back to paths
+    metadata = await asyncio.to_thread(_read_metadata, output_dir / job_id / "metadata.json")
+    
+    if metadata is not None:
+        # Upload videos to storage and update URLs
+        if settings.USE_S3:
+            clips = [
+                clip for clip in metadata["clips"]
+                if "path" in clip and clip["path"].startswith("/clips/")
+            ]
+            # Local file path with the "/clips/" prefix removed
+            public_urls = await _upload_clips(job_id, [output_dir / clip["path"][7:] for clip in clips])
+            for clip, public_url in zip(clips, public_urls):
+                if public_url is not None:
+                    clip["path"] = public_url
+                    clip["url_path"] = public_url
+        
+        # Remember where each clip's files live so handlers never have to scan for them
+        clips_dir = output_dir / job_id / "clips"
+        clip_files = {
+            str(clip["id"]): {"original": str(clips_dir / clip["filename"]), "captioned": None, "finalized": None}
+            for clip in metadata["clips"]
+            if "id" in clip and "filename" in clip
+        }
+        
+        # Update job status to complete with metadata
+        completed_fields = {
+            "status": "complete",
+            "message": "Processing completed successfully",
+            "results": metadata["clips"],
+            "metadata": metadata,
+            "is_demo": metadata.get("is_demo", False),
+            "clip_files": clip_files
+        }
+        print(f"✅ Job {job_id} completed successfully with {len(metadata['clips'])} clips")
+    else:
+        # Convert absolute paths to relative URLs for the frontend (fallback).
+        # The pipeline only returns clips it actually wrote, so no per-file stat.
+        if settings.USE_S3:
+            public_urls = await _upload_clips(job_id, [Path(path) for path in output_paths])
+            results = [url for url in public_urls if url is not None]
+        else:
+            results = [f"/clips/{job_id}/{os.path.basename(path)}" for path in output_paths]
+        
+        # Update job status to complete
+        completed_fields = {
+            "status": "complete",
+            "message": "Processing completed successfully",
+            "results": results,
+            "is_demo": True  # Assume demo if no metadata
+        }
+        print(f"✅ Job {job_id} completed with {len(results)} clips (fallback mode)")
+    
+    return completed_fields
+
+
+# Failure messages are persisted with the job; tool output can make them arbitrarily long
+MAX_ERROR_MESSAGE_LENGTH = 4096
+
+
 async def process_video_background(job_id: str, url: str, prompt: str):
     """Background task to process video using the ml_stuff pipeline"""
     try:
-        # Update job status to processing
-        job_data = job_manager.load_job(job_id)
-        if not job_data:
+        # Update job status to processing (existence check only, the record isn't kept
+        # alive for the rest of the pipeline run)
+        if not await job_manager.load_job(job_id):
             print(f"❌ Job {job_id} not found")
             return
             
-        job_data["status"] = "processing"
-        job_data["message"] = "Processing video..."
-        job_manager.save_job(job_id, job_data)
+        await job_manager.update_job(job_id, status="processing", message="Processing video...")
         
         if not VIDEO_PROCESSOR_AVAILABLE:
             raise Exception("Video processing pipeline is not available")
         
         print(f"🎬 Starting processing for job {job_id}")
-        # Call the ml_stuff processing pipeline
-        output_paths = run_processing_pipeline(
-            job_id=job_id,
-            url=url,
-            prompt=prompt,
-            output_dir=settings.LOCAL_OUTPUT_DIR
-        )
+        # Run the processing pipeline in the process pool so it doesn't block the
+        # event loop; only the worker processes ever import it
+        loop = asyncio.get_running_loop()
+        pool = app.state.pool
+        try:
+            output_paths = await loop.run_in_executor(pool, run_pipeline_job, job_id, url, prompt, output_dir_str)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed) and took the pool down with it; replace
+            # it once so later jobs don't all fail until the next restart
+            if app.state.pool is pool:
+                print("♻️ Pipeline process pool broke, starting a new one")
+                pool.shutdown(wait=False, cancel_futures=True)
+                app.state.pool = _create_pipeline_pool()
+            raise
         
-        # Load metadata if available, otherwise fall back to paths
-        local_job_dir = Path(settings.LOCAL_OUTPUT_DIR) / job_id
-        metadata_path = local_job_dir / "metadata.json"
+        completed_fields = await _collect_results(job_id, output_paths)
+        del output_paths
         
-        if metadata_path.exists():
-            with open(metadata_path, 'r') as f:
-                metadata = json.load(f)
-            
-            # Upload videos to storage and update URLs
-            if settings.USE_S3:
-                for clip in metadata["clips"]:
-                    if "path" in clip and clip["path"].startswith("/clips/"):
-                        # Extract local file path
-                        local_file_path = Path(settings.LOCAL_OUTPUT_DIR) / clip["path"][7:]  # Remove "/clips/"
-                        if local_file_path.exists():
-                            filename = local_file_path.name
-                            public_url = job_manager.upload_video(str(local_file_path), job_id, filename)
-                            clip["path"] = public_url
-                            clip["url_path"] = public_url
-            
-            # Update job status to complete with metadata
-            job_data["status"] = "complete"
-            job_data["message"] = "Processing completed successfully"
-            job_data["results"] = metadata["clips"]
-            job_data["metadata"] = metadata
-            job_data["is_demo"] = metadata.get("is_demo", False)
-            print(f"✅ Job {job_id} completed successfully with {len(metadata['clips'])} clips")
-        else:
-            # Convert absolute paths to relative URLs for the frontend (fallback)
-            results = []
-            for path in output_paths:
-                if os.path.exists(path):
-                    filename = os.path.basename(path)
-                    if settings.USE_S3:
-                        public_url = job_manager.upload_video(path, job_id, filename)
-                        results.append(public_url)
-                    else:
-                        results.append(f"/clips/{job_id}/{filename}")
-            
-            # Update job status to complete
-            job_data["status"] = "complete"
-            job_data["message"] = "Processing completed successfully"
-            job_data["results"] = results
-            job_data["is_demo"] = True  # Assume demo if no metadata
-            print(f"✅ Job {job_id} completed with {len(results)} clips (fallback mode)")
-        
-        job_manager.save_job(job_id, job_data)
+        await job_manager.update_job(job_id, **completed_fields)
         
     except Exception as e:
-        # Update job status to failed
-        job_data = job_manager.load_job(job_id)
-        if job_data:
-            job_data["status"] = "failed"
-            job_data["message"] = f"Processing failed: {str(e)}"
-            job_data["error"] = traceback.format_exc()
-            job_manager.save_job(job_id, job_data)
-        print(f"❌ Job {job_id} failed: {e}")
-        print(traceback.format_exc())
+        # The traceback goes to the log once; the job record only keeps a short summary
+        logger.exception("❌ Job %s failed", job_id)
+        # Release the failed frames' locals (clip lists, pipeline state) now rather
+        # than whenever the cycle collector gets to the traceback
+        traceback.clear_frames(e.__traceback__)
+        if await job_manager.load_job(job_id):
+            await job_manager.update_job(
+                job_id,
+                status="failed",
+                message=f"Processing failed: {e!s}"[:MAX_ERROR_MESSAGE_LENGTH],
+                error_type=type(e).__name__
+            )
 
 
 @app.get("/")
@@ -198,7 +420,7 @@ async def root():
     return {
         "message": "YouTube to Shorts API with Captions",
         "version": "1.0.0",
-        "jobs_count": len(jobs),
+        "cached_jobs": job_manager.cached_jobs,
         "endpoints": {
             "process": "POST /process",
             "status": "GET /status/{job_id}",
@@ -218,18 +440,22 @@ async def root():
     }
 
 
-@app.post("/process", response_model=ProcessResponse)
-async def process_video(request: ProcessRequest, background_tasks: BackgroundTasks):
+@app.post("/process", status_code=status.HTTP_202_ACCEPTED, response_model=ProcessResponse)
+async def process_video(request: ProcessRequest):
     """Start processing a YouTube video into shorts"""
     
     if not VIDEO_PROCESSOR_AVAILABLE:
+        raise _PIPELINE_UNAVAILABLE.with_traceback(None)
+    
+    # Every worker is busy and as many jobs again are already waiting
+    if settings.RATE_LIMIT_ENABLED and app.state.job_queue.qsize() >= settings.MAX_JOBS_PER_USER:
         raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Video processing pipeline is not available. Check that video_processing module exists and dependencies are installed."
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Too many jobs in progress (max {settings.MAX_JOBS_PER_USER}). Try again shortly."
         )
     
     # Generate unique job ID
-    job_id = str(uuid.uuid4())
+    job_id = uuid.uuid4().hex
     
     # Initialize job status
     job_data = {
@@ -241,17 +467,12 @@ async def process_video(request: ProcessRequest, background_tasks: BackgroundTas
         "created_at": str(Path().cwd())  # timestamp placeholder
     }
     
-    job_manager.save_job(job_id, job_data)
+    await job_manager.save_job(job_id, job_data)
     
     print(f"🆕 Created job {job_id} for URL: {request.url}")
     
-    # Add background task
-    background_tasks.add_task(
-        process_video_background,
-        job_id=job_id,
-        url=request.url,
-        prompt=request.prompt
-    )
+    # Hand the job to the queue workers
+    app.state.job_queue.put_nowait((job_id, request.url, request.prompt))
     
     return ProcessResponse(
         job_id=job_id,
@@ -261,21 +482,31 @@ async def process_video(request: ProcessRequest, background_tasks: BackgroundTas
 
 
 @app.get("/status/{job_id}", response_model=JobStatusResponse)
-async def get_job_status(job_id: str):
+async def get_job_status(job_id: str, request: Request, response: Response):
     """Get the status of a processing job"""
     
-    job = job_manager.load_job(job_id)
+    job = await job_manager.load_job(job_id)
     
-    if not job:
+    if job is None:
         print(f"❌ Job {job_id} not found in storage or memory")
-        print(f"📊 Available jobs: {list(job_manager.jobs.keys())}")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Job {job_id} not found"
-        )
+        raise _JOB_NOT_FOUND.with_traceback(None)
     
     print(f"📋 Status check for job {job_id}: {job['status']}")
     
+    # Pollers revalidate with If-None-Match and get an empty 304 until the job changes
+    version = job.get("version")
+    if version is None:
+        # Jobs saved before versioning: derive a tag from the fields pollers see
+        version = hashlib.blake2b(
+            f"{job_id}:{job['status']}:{job['message']}:{len(job.get('results') or ())}".encode(),
+            digest_size=8
+        ).hexdigest()
+    etag = f'W/"{version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    
     return JobStatusResponse(
         status=job["status"],
         message=job["message"],
@@ -288,30 +519,79 @@ async def get_job_status(job_id: str):
 @app.get("/jobs")
 async def list_jobs():
     """List all jobs (for debugging)"""
-    return {
-        "total_jobs": len(job_manager.jobs),
+    if not settings.DEBUG:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    
+    # Snapshot the cache so jobs added or evicted mid-stream don't break iteration
+    jobs = list(job_manager.jobs.items())
+    header = {
+        "total_jobs": len(jobs),
         "storage_type": "S3" if settings.USE_S3 else "Local",
-        "storage_location": settings.S3_BUCKET if settings.USE_S3 else settings.LOCAL_OUTPUT_DIR,
-        "jobs": {job_id: {
-            "status": job["status"], 
-            "message": job["message"],
-            "url": job.get("url", ""),
-            "has_results": job.get("results") is not None,
-            "has_finalized": job.get("finalized_results") is not None,
-            "created_at": job.get("created_at", "unknown")
-        } for job_id, job in job_manager.jobs.items()}
+        "storage_location": settings.S3_BUCKET if settings.USE_S3 else settings.LOCAL_OUTPUT_DIR
+    }
+    
+    async def generate():
+        # Emit the object incrementally instead of building the whole document in memory
+        yield orjson.dumps(header)[:-1] + b',"jobs":{'
+        for i, (job_id, job) in enumerate(jobs):
+            summary = {
+                "status": job["status"],
+                "message": job["message"],
+                "url": job.get("url", ""),
+                "has_results": job.get("results") is not None,
+                "has_finalized": job.get("finalized_results") is not None,
+                "created_at": job.get("created_at", "unknown")
+            }
+            yield (b',' if i else b'') + orjson.dumps(job_id) + b':' + orjson.dumps(summary)
+        yield b'}}'
+    
+    return StreamingResponse(generate(), media_type="application/json")
+
+
+def _list_mp4s(directory: Path) -> List[Path]:
+    """List the .mp4 files in a directory (os.scandir reuses the directory entry type, no extra stat)"""
+    try:
+        with os.scandir(directory) as entries:
+            return [Path(entry.path) for entry in entries if entry.name.endswith(".mp4") and entry.is_file(follow_symlinks=False)]
+    except FileNotFoundError:
+        return []
+
+
+def _count_mp4s(directory: Path) -> int:
+    """Count the .mp4 files in a directory without building a list"""
+    count = 0
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".mp4") and entry.is_file(follow_symlinks=False):
+                    count += 1
+    except FileNotFoundError:
+        pass
+    return count
+
+
+def _scan_job_dir(local_job_dir: Path) -> Dict[str, Any]:
+    """Summarize a job's output directory (blocking, run in a thread)"""
+    original_clips_dir = local_job_dir / "original_clips"
+    finalized_clips_dir = local_job_dir / "finalized_clips"
+    return {
+        "job_dir_exists": local_job_dir.exists(),
+        "original_clips_dir_exists": original_clips_dir.exists(),
+        "finalized_clips_dir_exists": finalized_clips_dir.exists(),
+        "original_clips_count": _count_mp4s(original_clips_dir),
+        "finalized_clips_count": _count_mp4s(finalized_clips_dir),
+        "job_dir_contents": [f.name for f in local_job_dir.iterdir()] if local_job_dir.exists() else []
     }
 
 
 @app.get("/debug/{job_id}")
 async def debug_job(job_id: str):
     """Debug a specific job"""
-    job = job_manager.load_job(job_id)
+    job = await job_manager.load_job(job_id)
     
     # Check if local files exist (even when using S3)
-    local_job_dir = Path(settings.LOCAL_OUTPUT_DIR) / job_id
-    original_clips_dir = local_job_dir / "original_clips"
-    finalized_clips_dir = local_job_dir / "finalized_clips"
+    file_system = await asyncio.to_thread(_scan_job_dir, output_dir / job_id)
+    stored_files = await asyncio.to_thread(job_manager.job_files, job_id) if settings.USE_S3 else None
     
     return {
         "job_id": job_id,
@@ -322,17 +602,80 @@ async def debug_job(job_id: str):
             "s3_bucket": settings.S3_BUCKET,
             "local_dir": settings.LOCAL_OUTPUT_DIR
         },
-        "file_system": {
-            "job_dir_exists": local_job_dir.exists(),
-            "original_clips_dir_exists": original_clips_dir.exists(),
-            "finalized_clips_dir_exists": finalized_clips_dir.exists(),
-            "original_clips_count": len(list(original_clips_dir.glob("*.mp4"))) if original_clips_dir.exists() else 0,
-            "finalized_clips_count": len(list(finalized_clips_dir.glob("*.mp4"))) if finalized_clips_dir.exists() else 0,
-            "job_dir_contents": [f.name for f in local_job_dir.iterdir()] if local_job_dir.exists() else []
-        }
+        "file_system": file_system,
+        "stored_files": sorted(stored_files) if stored_files is not None else None
     }
 
 
+@app.get("/clips/{file_path:path}")
+async def serve_clip(file_path: str):
+    """Serve a clip file, redirecting to S3 when it isn't stored locally"""
+    
+    if file_path.startswith("/") or ".." in Path(file_path).parts:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid clip path"
+        )
+    
+    # Captioned and finalized clips are only ever written locally, so check disk first
+    local_path = output_dir / file_path
+    if local_path.is_file():
+        if settings.CLIPS_ACCEL_REDIRECT_PREFIX:
+            # nginx sends the file (sendfile, range requests) once the path has been checked here
+            accel_path = f"{settings.CLIPS_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{quote(file_path)}"
+            return Response(headers={"X-Accel-Redirect": accel_path})
+        return FileResponse(local_path)
+    
+    if settings.USE_S3:
+        return RedirectResponse(f"{settings.base_url}/{file_path}", status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+    
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Clip {file_path} not found"
+    )
+
+
+@app.post("/upload-url", response_model=UploadUrlResponse)
+async def create_upload_url(request: UploadUrlRequest):
+    """Presign a direct upload to S3 so file bytes never pass through the API server"""
+    if not settings.USE_S3:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Direct uploads require S3 storage"
+        )
+    
+    filename = Path(request.filename).name
+    if not filename or filename != request.filename:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid filename"
+        )
+    
+    if await job_manager.load_job(request.job_id) is None:
+        raise _JOB_NOT_FOUND.with_traceback(None)
+    
+    # Presigned PUTs replace whatever is at the key, so an upload can only create a new file
+    if await asyncio.to_thread(job_manager.upload_exists, request.job_id, filename):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A file with this name has already been uploaded"
+        )
+    
+    upload_url = await asyncio.to_thread(
+        job_manager.get_upload_url,
+        request.job_id,
+        filename,
+        request.content_type,
+        settings.S3_UPLOAD_URL_EXPIRES
+    )
+    
+    return UploadUrlResponse(
+        upload_url=upload_url,
+        public_url=job_manager.get_video_url(request.job_id, f"{UPLOADS_DIR}/{filename}"),
+        expires_in=settings.S3_UPLOAD_URL_EXPIRES
+    )
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -341,7 +684,7 @@ async def health_check():
         "environment": settings.ENV,
         "video_processor_available": VIDEO_PROCESSOR_AVAILABLE,
         "caption_processor_available": CAPTION_PROCESSOR_AVAILABLE,
-        "total_jobs": len(job_manager.jobs),
+        "cached_jobs": job_manager.cached_jobs,
         "storage": {
             "type": "S3" if settings.USE_S3 else "Local",
             "bucket": settings.S3_BUCKET if settings.USE_S3 else None,
@@ -353,20 +696,69 @@ async def health_check():
     }
 
 
+_CLIP_SUBDIRS = ("original_clips", "clips", "captioned")
+
+
+def _list_clip_dirs(local_job_dir: Path) -> Dict[str, List[Path]]:
+    """List the .mp4 files in each of a job's clip directories (blocking)"""
+    return {subdir: _list_mp4s(local_job_dir / subdir) for subdir in _CLIP_SUBDIRS}
+
+
+def _scan_clip_files(local_job_dir: Path, clip_id: str, title: str = "", listings: Optional[Dict[str, List[Path]]] = None) -> Dict[str, Optional[str]]:
+    """Find a clip's files by scanning the job directory (blocking, legacy jobs only)"""
+    if listings is None:
+        listings = _list_clip_dirs(local_job_dir)
+    title_stem = title.replace(" ", "_")
+    
+    def find(subdirs: List[str], match_title: bool) -> Optional[str]:
+        for subdir in subdirs:
+            for file in listings[subdir]:
+                if clip_id in file.stem or (match_title and title_stem and title_stem in file.stem):
+                    return str(file)
+        return None
+    
+    return {
+        "original": find(["original_clips", "clips"], True),
+        "captioned": find(["captioned"], False),
+        "finalized": None
+    }
+
+
+async def _get_clip_files(job_id: str, job: Dict[str, Any], clip_id: str, title: str = "") -> Dict[str, Optional[str]]:
+    """Look up a clip's original/captioned/finalized files in the job's clip_files map"""
+    files = (job.get("clip_files") or {}).get(clip_id)
+    if files is not None:
+        return dict(files)
+    # Jobs processed before clip_files was recorded: fall back to scanning the directory
+    return await asyncio.to_thread(_scan_clip_files, output_dir / job_id, clip_id, title)
+
+
+async def _record_clip_files(job_id: str, job: Dict[str, Any], updates: Dict[str, Dict[str, Optional[str]]]):
+    """Persist new clip artifacts in the job's clip_files map"""
+    await job_manager.update_job(job_id, clip_files={**(job.get("clip_files") or {}), **updates})
+
+
+# Demo captions (optimized for word-by-word display), built once at import
+_MOCK_CAPTIONS = (
+    CaptionSegment(start=0.0, end=3.0, text="This will absolutely blow your mind!", confidence=0.95),
+    CaptionSegment(start=3.0, end=6.5, text="You won't believe what happens next", confidence=0.92),
+    CaptionSegment(start=6.5, end=10.0, text="This game changing technique just got revealed", confidence=0.88),
+    CaptionSegment(start=10.0, end=13.5, text="Your life will never be the same again", confidence=0.91),
+    CaptionSegment(start=13.5, end=16.0, text="Watch this incredible transformation", confidence=0.89)
+)
+
+
 @app.post("/captions/generate", response_model=GenerateCaptionsResponse)
 async def generate_captions(request: GenerateCaptionsRequest):
     """Generate captions for a video clip using speech recognition"""
     
     if not CAPTION_PROCESSOR_AVAILABLE:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Caption processing is not available"
-        )
+        raise _CAPTIONS_UNAVAILABLE.with_traceback(None)
     
     job_id = request.jobId
     clip_id = request.clipId
     
-    job = job_manager.load_job(job_id)
+    job = await job_manager.load_job(job_id)
     
     if not job:
         raise HTTPException(
@@ -390,43 +782,23 @@ async def generate_captions(request: GenerateCaptionsRequest):
             )
         
         # Find the video file
-        local_job_dir = Path(settings.LOCAL_OUTPUT_DIR) / job_id
-        clips_dir = local_job_dir / "clips"
-        original_clips_dir = local_job_dir / "original_clips"
-        
-        # Look for the clip file in both directories
-        clip_file = None
-        for clips_search_dir in [clips_dir, original_clips_dir]:
-            if clips_search_dir.exists():
-                for file in clips_search_dir.glob("*.mp4"):
-                    if clip_id in file.stem or clip_data.get("title", "").replace(" ", "_") in file.stem:
-                        clip_file = file
-                        break
-                if clip_file:
-                    break
+        clip_files = await _get_clip_files(job_id, job, clip_id, clip_data.get("title", ""))
+        clip_file = Path(clip_files["original"]) if clip_files["original"] else None
         
         if not clip_file or not clip_file.exists():
             # For demo purposes, generate mock captions optimized for word-by-word
             print(f"⚠️ Video file not found for clip {clip_id}, generating mock captions")
-            mock_captions = [
-                CaptionSegment(start=0.0, end=3.0, text="This will absolutely blow your mind!", confidence=0.95),
-                CaptionSegment(start=3.0, end=6.5, text="You won't believe what happens next", confidence=0.92),
-                CaptionSegment(start=6.5, end=10.0, text="This game changing technique just got revealed", confidence=0.88),
-                CaptionSegment(start=10.0, end=13.5, text="Your life will never be the same again", confidence=0.91),
-                CaptionSegment(start=13.5, end=16.0, text="Watch this incredible transformation", confidence=0.89)
-            ]
-            
             return GenerateCaptionsResponse(
                 status="success",
                 message="Mock captions generated successfully",
-                captions=mock_captions,
+                captions=list(_MOCK_CAPTIONS),
                 previewUrl=f"/clips/{job_id}/clips/{clip_file.name if clip_file else 'preview.mp4'}"
             )
         
         print(f"🎙️ Generating captions for {clip_file}")
         
         # Transcribe the video
-        transcript_segments = transcribe_video(str(clip_file))
+        transcript_segments = _get_transcriber()(str(clip_file))
         
         # Convert to caption segments
         captions = [
@@ -451,18 +823,10 @@ async def generate_captions(request: GenerateCaptionsRequest):
     except Exception as e:
         print(f"❌ Caption generation failed: {e}")
         # Return mock captions as fallback optimized for word-by-word
-        mock_captions = [
-            CaptionSegment(start=0.0, end=3.0, text="This will absolutely blow your mind!", confidence=0.95),
-            CaptionSegment(start=3.0, end=6.5, text="You won't believe what happens next", confidence=0.92),
-            CaptionSegment(start=6.5, end=10.0, text="This game changing technique just got revealed", confidence=0.88),
-            CaptionSegment(start=10.0, end=13.5, text="Your life will never be the same again", confidence=0.91),
-            CaptionSegment(start=13.5, end=16.0, text="Watch this incredible transformation", confidence=0.89)
-        ]
-        
         return GenerateCaptionsResponse(
             status="success",
             message="Mock captions generated (demo mode)",
-            captions=mock_captions
+            captions=list(_MOCK_CAPTIONS)
         )
 
 
@@ -471,15 +835,12 @@ async def apply_captions(request: ApplyCaptionsRequest):
     """Apply captions to a video clip with YouTube Shorts styling"""
     
     if not CAPTION_PROCESSOR_AVAILABLE:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Caption processing is not available"
-        )
+        raise _CAPTIONS_UNAVAILABLE.with_traceback(None)
     
     job_id = request.jobId
     clip_id = request.clipId
     
-    job = job_manager.load_job(job_id)
+    job = await job_manager.load_job(job_id)
     
     if not job:
         raise HTTPException(
@@ -489,24 +850,14 @@ async def apply_captions(request: ApplyCaptionsRequest):
     
     try:
         # Find the video file
-        local_job_dir = Path(settings.LOCAL_OUTPUT_DIR) / job_id
-        clips_dir = local_job_dir / "clips"
-        original_clips_dir = local_job_dir / "original_clips"
+        local_job_dir = output_dir / job_id
         captioned_clips_dir = local_job_dir / "captioned"
         
         # Create captioned directory
         captioned_clips_dir.mkdir(exist_ok=True)
         
-        # Look for the clip file
-        input_file = None
-        for clips_search_dir in [clips_dir, original_clips_dir]:
-            if clips_search_dir.exists():
-                for file in clips_search_dir.glob("*.mp4"):
-                    if clip_id in file.stem:
-                        input_file = file
-                        break
-                if input_file:
-                    break
+        clip_files = await _get_clip_files(job_id, job, clip_id)
+        input_file = Path(clip_files["original"]) if clip_files["original"] else None
         
         if not input_file or not input_file.exists():
             raise HTTPException(
@@ -515,25 +866,32 @@ async def apply_captions(request: ApplyCaptionsRequest):
             )
         
         # Create output filename
-        safe_clip_id = "".join(c for c in clip_id if c.isalnum() or c in ('-', '_'))
+        safe_clip_id = _sanitize(clip_id, _CLIP_ID_TABLE, "-_")
         output_filename = f"{safe_clip_id}_captioned.mp4"
         output_file = captioned_clips_dir / output_filename
         
-        print(f"🎬 Applying captions to {input_file} -> {output_file}")
+        # Finalized clips may be hard links to an earlier captioned file; write a
+        # new inode instead of truncating the one they share
+        output_file.unlink(missing_ok=True)
         
-        # Convert Pydantic models to dictionaries for the video processor
-        captions_dict = [caption.dict() for caption in request.captions]
-        style_dict = request.style.dict()
+        print(f"🎬 Applying captions to {input_file} -> {output_file}")
         
-        # Apply captions using the caption burner
-        success = apply_captions_to_video(
-            str(input_file),
-            str(output_file),
-            captions_dict,
-            style_dict
-        )
+        # The request models are already validated, so they go to the burner as-is.
+        # ffmpeg runs in a thread so the event loop keeps serving; the slots cap
+        # concurrent burns at what the encoder can sustain
+        async with app.state.caption_slots:
+            success = await asyncio.to_thread(
+                _get_caption_burner(),
+                str(input_file),
+                str(output_file),
+                request.captions,
+                request.style
+            )
         
         if success and output_file.exists():
+            clip_files["captioned"] = str(output_file)
+            await _record_clip_files(job_id, job, {clip_id: clip_files})
+            
             # Generate URL for the captioned video
             output_url = f"/clips/{job_id}/captioned/{output_filename}"
             
@@ -556,14 +914,318 @@ async def apply_captions(request: ApplyCaptionsRequest):
         )
 
 
-@app.post("/finalize/{job_id}", response_model=FinalizeResponse)
-async def finalize_clips(job_id: str, request: FinalizeRequest):
-    """Re-process clips with edited timings to create final trimmed videos"""
+# Only the end of ffmpeg's stderr is kept for error messages
+FFMPEG_STDERR_TAIL = 64 * 1024
+
+
+async def _run_ffmpeg(cmd: List[str]) -> Tuple[int, bytes]:
+    """Run an ffmpeg command as an asyncio subprocess, returning its exit code and the tail of stderr"""
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE
+    )
+    # Drain stderr as it arrives so the pipe never blocks ffmpeg, keeping memory bounded
+    tail = bytearray()
+    while chunk := await process.stderr.read(FFMPEG_STDERR_TAIL):
+        tail += chunk
+        del tail[:-FFMPEG_STDERR_TAIL]
+    await process.wait()
+    return process.returncode, bytes(tail)
+
+
+async def _trim_clip(
+    source_file: Path,
+    finalized_path: Path,
+    start_time: float,
+    duration: float,
+    threads: int = 0,
+    frame_accurate: bool = False
+) -> Optional[float]:
+    """Trim one clip with ffmpeg without tying up a thread while it runs; returns the start actually cut at"""
+    # A previous finalize may have hard-linked this path to the source file;
+    # unlink it so ffmpeg -y doesn't truncate the input it is reading
+    finalized_path.unlink(missing_ok=True)
     
-    import shutil
-    import subprocess
+    keyframes = await asyncio.to_thread(keyframe_times, str(source_file))
+    if frame_accurate:
+        # Stream-copy only when the cut already lands on a keyframe, otherwise re-encode
+        stream_copy = is_keyframe_aligned(start_time, keyframes)
+    else:
+        # Move the cut back to the keyframe before it so the clip can always be stream-copied
+        snapped_start = snap_to_keyframe(start_time, keyframes)
+        duration += start_time - snapped_start
+        start_time = snapped_start
+        stream_copy = True
+    ffmpeg_cmd = trim_command(str(source_file), str(finalized_path), start_time, duration, stream_copy, threads)
+    
+    returncode, stderr = await _run_ffmpeg(ffmpeg_cmd)
     
-    job = job_manager.load_job(job_id)
+    if returncode != 0 and stream_copy:
+        print(f"⚠️ FFmpeg copy failed, trying with re-encoding: {stderr.decode(errors='replace')}")
+        # Try with re-encoding if copy fails
+        ffmpeg_cmd = trim_command(str(source_file), str(finalized_path), start_time, duration, False, threads)
+        returncode, stderr = await _run_ffmpeg(ffmpeg_cmd)
+    
+    if returncode != 0:
+        print(f"❌ FFmpeg processing failed for {finalized_path.name}: {stderr.decode(errors='replace')}")
+        return None
+    # ffmpeg only exits 0 once the output file is written, so no extra stat is needed
+    return start_time
+
+
+def _inline_schema_refs(schema: Any, defs: Optional[Dict[str, Any]] = None) -> Any:
+    """Replace local $defs references so a model schema can be embedded in the OpenAPI document"""
+    if defs is None:
+        defs = schema.pop("$defs", {})
+    if isinstance(schema, dict):
+        ref = schema.get("$ref")
+        if ref is not None and ref.startswith("#/$defs/"):
+            return _inline_schema_refs(defs[ref[len("#/$defs/"):]], defs)
+        return {key: _inline_schema_refs(value, defs) for key, value in schema.items()}
+    if isinstance(schema, list):
+        return [_inline_schema_refs(item, defs) for item in schema]
+    return schema
+
+
+def _parse_finalize_request(body: bytes) -> FinalizeRequest:
+    """Validate a finalize body straight from JSON bytes in pydantic-core"""
+    try:
+        return FinalizeRequest.model_validate_json(body)
+    except ValidationError as e:
+        # Same 422 shape FastAPI produces for body validation errors
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        )
+
+
+async def _finalize(job_id: str, job: Dict[str, Any], edited_clips: List[EditedClip], frame_accurate: bool = False) -> Dict[str, Any]:
+    """Trim the edited clips and record the finalized results on the job"""
+    print(f"🎬 Starting finalization for job {job_id} with {len(edited_clips)} clips")
+    
+    local_job_dir = output_dir / job_id
+    clips_dir = local_job_dir / "clips"  # This is where the original clips are stored
+    original_clips_dir = local_job_dir / "original_clips" 
+    finalized_clips_dir = local_job_dir / "finalized_clips"
+    
+    # Verify job output directory exists
+    if not local_job_dir.exists():
+        raise Exception(f"Job output directory not found: {local_job_dir}")
+    
+    # Verify clips directory exists (where original clips are stored)
+    if not clips_dir.exists():
+        raise Exception(f"Clips directory not found: {clips_dir}")
+    
+    # Create directories
+    finalized_clips_dir.mkdir(exist_ok=True)
+    
+    # Create original_clips directory but DON'T move files yet
+    original_clips_dir.mkdir(exist_ok=True)
+    
+    # Only move files if original_clips is empty AND we're actually finalizing
+    moved_files = 0
+    if not _count_mp4s(original_clips_dir) and clips_dir.exists():
+        # Hard-link (don't move) existing clip files from clips/ to original_clips/ to preserve access
+        for file in _list_mp4s(clips_dir):
+            link_or_copy(file, original_clips_dir / file.name)
+            moved_files += 1
+        print(f"📁 Linked {moved_files} original clips into original_clips/ directory (preserving clips/ access)")
+    else:
+        print(f"📁 Original clips already in original_clips/ directory")
+    
+    # Jobs processed before clip_files was recorded: list their directories once
+    # and match every edited clip against that instead of rescanning per clip
+    legacy_files = None
+    if job.get("clip_files") is None:
+        listings = await asyncio.to_thread(_list_clip_dirs, local_job_dir)
+        legacy_files = {
+            edited_clip.id: _scan_clip_files(local_job_dir, edited_clip.id, edited_clip.title, listings)
+            for edited_clip in edited_clips
+        }
+    
+    # ffmpeg runs in its own process, awaited as an asyncio subprocess, so clips
+    # are trimmed in parallel from the event loop; cap it at one ffmpeg per core
+    cpu_count = os.cpu_count() or 1
+    concurrent_encodes = max(1, min(cpu_count, len(edited_clips)))
+    ffmpeg_slots = asyncio.Semaphore(concurrent_encodes)
+    # Split the cores between concurrent re-encodes so x264 threads don't oversubscribe
+    encode_threads = max(1, cpu_count // concurrent_encodes)
+    
+    # URL prefixes shared by every clip's result
+    job_url = f"/clips/{job_id}"
+    original_url = f"{job_url}/original_clips"
+    captioned_url = f"{job_url}/captioned"
+    finalized_url = f"{job_url}/finalized_clips"
+    
+    async def finalize_one(i: int, edited_clip: EditedClip):
+        print(f"🔄 Processing clip {i+1}/{len(edited_clips)}: {edited_clip.title}")
+        
+        # Prefer a captioned version of this clip, falling back to the original
+        if legacy_files is not None:
+            files = legacy_files[edited_clip.id]
+        else:
+            files = await _get_clip_files(job_id, job, edited_clip.id, edited_clip.title)
+        captioned_file = Path(files["captioned"]) if files["captioned"] else None
+        original_file = Path(files["original"]) if files["original"] else None
+        if captioned_file:
+            print(f"🎬 Found captioned version: {captioned_file.name}")
+        
+        source_file = captioned_file if captioned_file else original_file
+        
+        if not source_file:
+            print(f"⚠️ Warning: Could not find source file for clip {edited_clip.id}")
+            return None
+        
+        print(f"📂 Using source file: {source_file.name} ({'captioned' if captioned_file else 'original'})")
+        
+        # Create finalized filename
+        safe_title = _sanitize(edited_clip.title, _FILENAME_TABLE, " -_").strip().replace(' ', '_')
+        finalized_filename = f"{safe_title}_final.mp4"
+        finalized_path = finalized_clips_dir / finalized_filename
+        
+        # Convert absolute timestamps to relative timestamps within the clip
+        # Each clip was extracted from a specific segment of the original video
+        clip_original_start = edited_clip.start_time  # Where this clip starts in the original video
+        
+        # Calculate relative timestamps within the clip (0-based)
+        relative_start = max(0, edited_clip.editedStart - clip_original_start)
+        relative_end = edited_clip.editedEnd - clip_original_start
+        
+        # Ensure we don't exceed the clip boundaries
+        clip_duration = edited_clip.end_time - edited_clip.start_time
+        relative_end = min(relative_end, clip_duration)
+        
+        start_time = relative_start
+        end_time = relative_end
+        duration = end_time - start_time
+        
+        # A clip whose times haven't changed much is used as-is, captioned or not
+        unchanged = abs(relative_start) < 0.5 and abs(relative_end - clip_duration) < 0.5
+        
+        if unchanged:
+            print(f"📋 Linking {'captioned' if captioned_file else 'original'} file directly (no trimming needed)")
+            duration = clip_duration
+        elif captioned_file:
+            print(f"✂️ Trimming captioned file: {start_time:.1f}s to {end_time:.1f}s (duration: {duration:.1f}s)")
+        else:
+            print(f"✂️ Trimming {source_file.name}: {start_time:.1f}s to {end_time:.1f}s (duration: {duration:.1f}s)")
+            print(f"📊 Original clip range: {clip_original_start:.1f}s-{edited_clip.end_time:.1f}s, edited range: {edited_clip.editedStart:.1f}s-{edited_clip.editedEnd:.1f}s")
+        
+        # Validate duration
+        if duration <= 0:
+            print(f"⚠️ Invalid duration {duration:.1f}s for clip {edited_clip.title} - skipping")
+            return None
+        
+        async with ffmpeg_slots:
+            if unchanged:
+                # Raises if neither a link nor a copy could be made
+                await asyncio.to_thread(link_or_copy, source_file, finalized_path)
+                created = True
+            else:
+                cut_start = await _trim_clip(source_file, finalized_path, start_time, duration, encode_threads, frame_accurate)
+                created = cut_start is not None
+                if created:
+                    # A keyframe-snapped cut starts earlier than requested and runs to the same end
+                    start_time = cut_start
+                    duration = end_time - start_time
+        
+        if not created:
+            print(f"❌ Failed to create finalized clip for {edited_clip.title}")
+            return None
+        
+        # Add to finalized results
+        relative_path = f"{finalized_url}/{finalized_filename}"
+        files["finalized"] = str(finalized_path)
+        
+        source_type = "captioned" if captioned_file else "original"
+        print(f"✅ Successfully created finalized clip: {finalized_filename} (from {source_type} source)")
+        
+        return {
+            "id": edited_clip.id,
+            "title": edited_clip.title,
+            "path": relative_path,
+            "url_path": relative_path,
+            "start_time": start_time,
+            "end_time": end_time,
+            # Display strings are filled in for the whole batch once every clip is done
+            "duration": duration,
+            "text": edited_clip.text,
+            "caption": edited_clip.caption,
+            "hashtags": edited_clip.hashtags,
+            "original_file": f"{original_url}/{original_file.name}" if original_file else None,
+            "captioned_source": f"{captioned_url}/{captioned_file.name}" if captioned_file else None
+        }, files
+    
+    outcomes = await asyncio.gather(
+        *(finalize_one(i, edited_clip) for i, edited_clip in enumerate(edited_clips)),
+        return_exceptions=True
+    )
+    
+    # Results keep the order of the edited clips; failed clips are reported and skipped
+    finalized_results = []
+    finalized_files = {}
+    for edited_clip, outcome in zip(edited_clips, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"❌ Error processing clip {edited_clip.id}: {outcome}")
+        elif outcome is not None:
+            finalized_result, files = outcome
+            finalized_results.append(finalized_result)
+            finalized_files[edited_clip.id] = files
+    _format_clip_times(finalized_results)
+    
+    # With S3, publish the finalized clips there as well (concurrently, multipart
+    # for large files) so any API host or the CDN can serve them
+    if settings.USE_S3 and finalized_results:
+        public_urls = await _upload_clips(
+            job_id,
+            [Path(finalized_files[result["id"]]["finalized"]) for result in finalized_results],
+            "finalized_clips"
+        )
+        for result, public_url in zip(finalized_results, public_urls):
+            if public_url is not None:
+                result["path"] = public_url
+                result["url_path"] = public_url
+    
+    # Update job with finalized results
+    await job_manager.update_job(
+        job_id,
+        finalized_results=finalized_results,
+        finalized_at=str(Path().cwd())  # timestamp placeholder
+    )
+    if finalized_files:
+        await _record_clip_files(job_id, job, finalized_files)
+    
+    print(f"🎉 Finalization completed: {len(finalized_results)}/{len(edited_clips)} clips processed successfully")
+    
+    return {
+        "status": "success",
+        "message": f"Successfully finalized {len(finalized_results)} clips",
+        "finalized_clips": finalized_results,
+        "organization": {
+            "original_clips": f"{original_url}/",
+            "finalized_clips": f"{finalized_url}/"
+        }
+    }
+
+
+@app.post(
+    "/finalize/{job_id}",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=FinalizeAcceptedResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": _inline_schema_refs(FinalizeRequest.model_json_schema())}}
+        }
+    }
+)
+async def finalize_clips(job_id: str, raw_request: Request):
+    """Re-process clips with edited timings to create final trimmed videos"""
+    # The body can carry many edited clips, so it is parsed and validated in one pass
+    # by pydantic-core instead of json.loads followed by model validation
+    request = _parse_finalize_request(await raw_request.body())
+    
+    job = await job_manager.load_job(job_id)
     
     if not job:
         print(f"❌ Finalize: Job {job_id} not found in storage or memory")
@@ -580,228 +1242,70 @@ async def finalize_clips(job_id: str, request: FinalizeRequest):
             detail=f"Job must be completed before finalizing. Current status: {job['status']}"
         )
     
-    try:
-        edited_clips = request.edited_clips
-        print(f"🎬 Starting finalization for job {job_id} with {len(edited_clips)} clips")
-        
-        local_job_dir = Path(settings.LOCAL_OUTPUT_DIR) / job_id
-        clips_dir = local_job_dir / "clips"  # This is where the original clips are stored
-        original_clips_dir = local_job_dir / "original_clips" 
-        finalized_clips_dir = local_job_dir / "finalized_clips"
-        
-        # Verify job output directory exists
-        if not local_job_dir.exists():
-            raise Exception(f"Job output directory not found: {local_job_dir}")
-        
-        # Verify clips directory exists (where original clips are stored)
-        if not clips_dir.exists():
-            raise Exception(f"Clips directory not found: {clips_dir}")
-        
-        # Create directories
-        finalized_clips_dir.mkdir(exist_ok=True)
-        
-        # Create original_clips directory but DON'T move files yet
-        original_clips_dir.mkdir(exist_ok=True)
-        
-        # Only move files if original_clips is empty AND we're actually finalizing
-        moved_files = 0
-        if not any(original_clips_dir.glob("*.mp4")) and clips_dir.exists():
-            # Copy (don't move) existing clip files from clips/ to original_clips/ to preserve access
-            for file in clips_dir.glob("*.mp4"):
-                shutil.copy2(str(file), str(original_clips_dir / file.name))
-                moved_files += 1
-            print(f"📁 Copied {moved_files} original clips to original_clips/ directory (preserving clips/ access)")
-        else:
-            print(f"📁 Original clips already in original_clips/ directory")
-        
-        finalized_results = []
-        
-        for i, edited_clip in enumerate(edited_clips):
-            try:
-                print(f"🔄 Processing clip {i+1}/{len(edited_clips)}: {edited_clip.title}")
-                
-                # First, check if there's a captioned version of this clip
-                captioned_clips_dir = local_job_dir / "captioned"
-                captioned_file = None
-                if captioned_clips_dir.exists():
-                    for file in captioned_clips_dir.glob("*.mp4"):
-                        if edited_clip.id in file.stem:
-                            captioned_file = file
-                            print(f"🎬 Found captioned version: {captioned_file.name}")
-                            break
-                
-                # Find the original clip file (fallback if no captioned version)
-                original_file = None
-                # First try original_clips directory
-                for file in original_clips_dir.glob("*.mp4"):
-                    if edited_clip.id in file.stem or edited_clip.title.replace(" ", "_") in file.stem:
-                        original_file = file
-                        break
-                
-                # If not found in original_clips, try clips directory
-                if not original_file and clips_dir.exists():
-                    for file in clips_dir.glob("*.mp4"):
-                        if edited_clip.id in file.stem or edited_clip.title.replace(" ", "_") in file.stem:
-                            original_file = file
-                            break
-                
-                # Use captioned version if available, otherwise use original
-                source_file = captioned_file if captioned_file else original_file
-                
-                if not source_file:
-                    print(f"⚠️ Warning: Could not find source file for clip {edited_clip.id}")
-                    print(f"📁 Available original files: {[f.name for f in original_clips_dir.glob('*.mp4')]}")
-                    print(f"📁 Available clips files: {[f.name for f in clips_dir.glob('*.mp4')] if clips_dir.exists() else 'None'}")
-                    print(f"📁 Available captioned files: {[f.name for f in captioned_clips_dir.glob('*.mp4')] if captioned_clips_dir.exists() else 'None'}")
-                    continue
-                
-                print(f"📂 Using source file: {source_file.name} ({'captioned' if captioned_file else 'original'})")
-                
-                # Create finalized filename
-                safe_title = "".join(c for c in edited_clip.title if c.isalnum() or c in (' ', '-', '_')).strip()
-                safe_title = safe_title.replace(' ', '_')
-                finalized_filename = f"{safe_title}_final.mp4"
-                finalized_path = finalized_clips_dir / finalized_filename
-                
-                # If using captioned version, we may not need to trim (it might already be trimmed)
-                if captioned_file:
-                    # For captioned files, just copy or do minimal processing
-                    print(f"🎬 Using captioned version: {captioned_file.name}")
-                    
-                    # Check if we still need to trim the captioned file
-                    clip_original_start = edited_clip.start_time
-                    relative_start = max(0, edited_clip.editedStart - clip_original_start)
-                    relative_end = edited_clip.editedEnd - clip_original_start
-                    clip_duration = edited_clip.end_time - edited_clip.start_time
-                    relative_end = min(relative_end, clip_duration)
-                    
-                    start_time = relative_start
-                    end_time = relative_end
-                    duration = end_time - start_time
-                    
-                    # If the times haven't changed much, just copy the captioned file
-                    if abs(relative_start) < 0.5 and abs(relative_end - clip_duration) < 0.5:
-                        print(f"📋 Copying captioned file directly (no additional trimming needed)")
-                        shutil.copy2(str(captioned_file), str(finalized_path))
-                        duration = clip_duration
-                    else:
-                        print(f"✂️ Trimming captioned file: {start_time:.1f}s to {end_time:.1f}s (duration: {duration:.1f}s)")
-                else:
-                    # Convert absolute timestamps to relative timestamps within the clip
-                    # Each clip was extracted from a specific segment of the original video
-                    clip_original_start = edited_clip.start_time  # Where this clip starts in the original video
-                    
-                    # Calculate relative timestamps within the clip (0-based)
-                    relative_start = max(0, edited_clip.editedStart - clip_original_start)
-                    relative_end = edited_clip.editedEnd - clip_original_start
-                    
-                    # Ensure we don't exceed the clip boundaries
-                    clip_duration = edited_clip.end_time - edited_clip.start_time
-                    relative_end = min(relative_end, clip_duration)
-                    
-                    start_time = relative_start
-                    end_time = relative_end
-                    duration = end_time - start_time
-                    
-                    print(f"✂️ Trimming {source_file.name}: {start_time:.1f}s to {end_time:.1f}s (duration: {duration:.1f}s)")
-                    print(f"📊 Original clip range: {clip_original_start:.1f}s-{edited_clip.end_time:.1f}s, edited range: {edited_clip.editedStart:.1f}s-{edited_clip.editedEnd:.1f}s")
-                
-                # Validate duration
-                if duration <= 0:
-                    print(f"⚠️ Invalid duration {duration:.1f}s for clip {edited_clip.title} - skipping")
-                    continue
-                
-                # Use FFmpeg to trim the video (only if we haven't already copied)
-                
-                # Skip FFmpeg processing if we already copied the captioned file
-                if not (captioned_file and abs(relative_start) < 0.5 and abs(relative_end - clip_duration) < 0.5):
-                    ffmpeg_cmd = [
-                        'ffmpeg', '-y',  # -y to overwrite output files
-                        '-i', str(source_file),
-                        '-ss', str(start_time),  # Start time within the clip
-                        '-t', str(duration),     # Duration to extract
-                        '-c', 'copy',            # Copy without re-encoding for speed
-                        str(finalized_path)
-                    ]
-                    
-                    result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
-                    
-                    if result.returncode != 0:
-                        print(f"⚠️ FFmpeg copy failed, trying with re-encoding: {result.stderr}")
-                        # Try with re-encoding if copy fails
-                        ffmpeg_cmd = [
-                            'ffmpeg', '-y',
-                            '-i', str(source_file),
-                            '-ss', str(start_time),
-                            '-t', str(duration),
-                            '-c:v', 'libx264', '-c:a', 'aac',
-                            str(finalized_path)
-                        ]
-                        result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
-                    
-                    # Check if processing succeeded
-                    if result.returncode != 0 or not finalized_path.exists():
-                        print(f"❌ FFmpeg processing failed for {edited_clip.title}")
-                        continue
-                
-                if finalized_path.exists():
-                    # Add to finalized results
-                    relative_path = f"/clips/{job_id}/finalized_clips/{finalized_filename}"
-                    
-                    finalized_results.append({
-                        "id": edited_clip.id,
-                        "title": edited_clip.title,
-                        "path": relative_path,
-                        "url_path": relative_path,
-                        "start_time": start_time,
-                        "end_time": end_time,
-                        "duration": format_duration(duration),
-                        "startTime": f"{int(start_time//60):02d}:{int(start_time%60):02d}",
-                        "endTime": f"{int(end_time//60):02d}:{int(end_time%60):02d}",
-                        "text": edited_clip.text,
-                        "caption": edited_clip.caption,
-                        "hashtags": edited_clip.hashtags,
-                        "original_file": f"/clips/{job_id}/original_clips/{original_file.name}" if original_file else None,
-                        "captioned_source": f"/clips/{job_id}/captioned/{captioned_file.name}" if captioned_file else None
-                    })
-                    
-                    source_type = "captioned" if captioned_file else "original"
-                    print(f"✅ Successfully created finalized clip: {finalized_filename} (from {source_type} source)")
-                else:
-                    print(f"❌ Failed to create finalized clip for {edited_clip.title}")
-                    if 'result' in locals():
-                        print(f"FFmpeg stderr: {result.stderr}")
-                    
-            except Exception as e:
-                print(f"❌ Error processing clip {edited_clip.id}: {e}")
-                continue
-        
-        # Update job with finalized results
-        job["finalized_results"] = finalized_results
-        job["finalized_at"] = str(Path().cwd())  # timestamp placeholder
-        job_manager.save_job(job_id, job)
-        
-        print(f"🎉 Finalization completed: {len(finalized_results)}/{len(edited_clips)} clips processed successfully")
-        
-        return {
-            "status": "success",
-            "message": f"Successfully finalized {len(finalized_results)} clips",
-            "finalized_clips": finalized_results,
-            "organization": {
-                "original_clips": f"/clips/{job_id}/original_clips/",
-                "finalized_clips": f"/clips/{job_id}/finalized_clips/"
-            }
-        }
-        
-    except Exception as e:
-        print(f"❌ Finalization error for job {job_id}: {e}")
-        print(traceback.format_exc())
+    if _finalize_running(job):
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to finalize clips: {str(e)}"
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job {job_id} is already being finalized"
+        )
+    
+    # Trimming can take a while for many clips, so it runs on the finalize queue;
+    # clients poll GET /finalize/{job_id} for the result
+    await job_manager.update_job(
+        job_id,
+        finalize_status="processing",
+        finalize_message="Finalizing clips...",
+        finalize_started_at=time.time()
+    )
+    app.state.finalize_queue.put_nowait((job_id, request.edited_clips, request.frame_accurate))
+    
+    return FinalizeAcceptedResponse(
+        status="accepted",
+        message=f"Finalizing {len(request.edited_clips)} clips",
+        finalize_id=job_id
+    )
+
+
+@app.get("/finalize/{job_id}", response_model=FinalizeResponse)
+async def get_finalize_status(job_id: str):
+    """Get the status and results of a job's finalization"""
+    # Read through to the job store: another worker may be the one finalizing
+    job = await job_manager.refresh_job(job_id)
+    
+    if job is None:
+        raise _JOB_NOT_FOUND.with_traceback(None)
+    
+    finalize_status = job.get("finalize_status")
+    if finalize_status is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} has not been finalized"
         )
+    finalize_message = job.get("finalize_message", "")
+    if finalize_status == "processing" and not _finalize_running(job):
+        finalize_status = "failed"
+        finalize_message = "Finalization was interrupted; submit it again"
+    
+    job_url = f"/clips/{job_id}"
+    return FinalizeResponse(
+        status=finalize_status,
+        message=finalize_message,
+        finalized_clips=(job.get("finalized_results") or []) if finalize_status == "success" else [],
+        organization={
+            "original_clips": f"{job_url}/original_clips/",
+            "finalized_clips": f"{job_url}/finalized_clips/"
+        }
+    )
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    # uvloop/httptools come with uvicorn[standard]; an import string is required
+    # for uvicorn to spawn more than one worker
+    uvicorn.run(
+        "app.main:app",
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=settings.WORKERS,
+        loop="uvloop",
+        http="httptools"
+    ) 
\ No newline at end of file
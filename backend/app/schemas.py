@@ -1,19 +1,35 @@
-from pydantic import BaseModel, HttpUrl
+import re
+
+from pydantic import BaseModel, ConfigDict, HttpUrl, field_validator
 from typing import List, Optional, Any, Literal
 
 
+_YT_RE = re.compile(r"^https?://(www\.|m\.)?(youtube\.com|youtu\.be)/")
+_VIDEO_MIME_RE = re.compile(r"^video/[a-z0-9][a-z0-9.+-]*$")
+
+
 class ProcessRequest(BaseModel):
     """Request model for processing a YouTube video into shorts"""
     url: str
     prompt: str
     
-    class Config:
-        json_schema_extra = {
+    @field_validator("url")
+    @classmethod
+    def validate_youtube_url(cls, value: str) -> str:
+        """Reject anything that isn't a YouTube link before a job is created"""
+        value = value.strip()
+        if not _YT_RE.match(value):
+            raise ValueError("url must be a youtube.com or youtu.be link")
+        return value
+    
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
                 "prompt": "Create engaging short clips about the main topics"
             }
         }
+    )
 
 
 class ProcessResponse(BaseModel):
@@ -22,14 +38,15 @@ class ProcessResponse(BaseModel):
     status: str
     message: str
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
-                "job_id": "123e4567-e89b-12d3-a456-426614174000",
+                "job_id": "123e4567e89b12d3a456426614174000",
                 "status": "pending",
                 "message": "Job started successfully"
             }
         }
+    )
 
 
 class EditedClip(BaseModel):
@@ -47,8 +64,8 @@ class EditedClip(BaseModel):
     caption: Optional[str] = ""
     hashtags: Optional[List[str]] = []
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "id": "clip_1",
                 "title": "Opening Hook",
@@ -64,14 +81,17 @@ class EditedClip(BaseModel):
                 "hashtags": ["viral", "mindblown"]
             }
         }
+    )
 
 
 class FinalizeRequest(BaseModel):
     """Request model for finalizing edited clips"""
     edited_clips: List[EditedClip]
+    # Re-encode cuts that don't land on a keyframe instead of snapping them back to one
+    frame_accurate: bool = False
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "edited_clips": [
                     {
@@ -88,9 +108,28 @@ class FinalizeRequest(BaseModel):
                         "caption": "This will blow your mind! 🤯",
                         "hashtags": ["viral", "mindblown"]
                     }
-                ]
+                ],
+                "frame_accurate": False
             }
         }
+    )
+
+
+class FinalizeAcceptedResponse(BaseModel):
+    """Response model for a queued finalize operation"""
+    status: str
+    message: str
+    finalize_id: str
+    
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "status": "accepted",
+                "message": "Finalizing 3 clips",
+                "finalize_id": "123e4567e89b12d3a456426614174000"
+            }
+        }
+    )
 
 
 class FinalizedClip(BaseModel):
@@ -117,8 +156,8 @@ class FinalizeResponse(BaseModel):
     finalized_clips: List[FinalizedClip]
     organization: dict
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "status": "success",
                 "message": "Successfully finalized 3 clips",
@@ -129,6 +168,7 @@ class FinalizeResponse(BaseModel):
                 }
             }
         }
+    )
 
 
 class ClipMetadata(BaseModel):
@@ -172,10 +212,10 @@ class GenerateCaptionsRequest(BaseModel):
     clipId: str
     style: Optional[CaptionStyle] = None
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
-                "jobId": "123e4567-e89b-12d3-a456-426614174000",
+                "jobId": "123e4567e89b12d3a456426614174000",
                 "clipId": "clip_1",
                 "style": {
                     "fontSize": 48,
@@ -189,6 +229,7 @@ class GenerateCaptionsRequest(BaseModel):
                 }
             }
         }
+    )
 
 
 class GenerateCaptionsResponse(BaseModel):
@@ -198,8 +239,8 @@ class GenerateCaptionsResponse(BaseModel):
     captions: List[CaptionSegment]
     previewUrl: Optional[str] = None
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "status": "success",
                 "message": "Captions generated successfully",
@@ -214,6 +255,7 @@ class GenerateCaptionsResponse(BaseModel):
                 "previewUrl": "/clips/job_123/previews/clip_1_preview.mp4"
             }
         }
+    )
 
 
 class ApplyCaptionsRequest(BaseModel):
@@ -223,10 +265,10 @@ class ApplyCaptionsRequest(BaseModel):
     captions: List[CaptionSegment]
     style: CaptionStyle
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
-                "jobId": "123e4567-e89b-12d3-a456-426614174000",
+                "jobId": "123e4567e89b12d3a456426614174000",
                 "clipId": "clip_1",
                 "captions": [
                     {
@@ -248,6 +290,7 @@ class ApplyCaptionsRequest(BaseModel):
                 }
             }
         }
+    )
 
 
 class ApplyCaptionsResponse(BaseModel):
@@ -257,8 +300,8 @@ class ApplyCaptionsResponse(BaseModel):
     outputPath: str
     previewUrl: str
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "status": "success",
                 "message": "Captions applied successfully",
@@ -266,6 +309,50 @@ class ApplyCaptionsResponse(BaseModel):
                 "previewUrl": "/clips/job_123/captioned/clip_1_captioned.mp4"
             }
         }
+    )
+
+
+class UploadUrlRequest(BaseModel):
+    """Request model for a direct-to-storage upload URL"""
+    job_id: str
+    filename: str
+    content_type: str = "video/mp4"
+    
+    @field_validator("content_type")
+    @classmethod
+    def validate_video_type(cls, value: str) -> str:
+        """Only videos may be uploaded; anything else (e.g. text/html) would be served from the public bucket"""
+        value = value.strip().lower()
+        if not _VIDEO_MIME_RE.match(value):
+            raise ValueError("content_type must be a video/* type")
+        return value
+    
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "job_id": "123e4567e89b12d3a456426614174000",
+                "filename": "clip_1_edited.mp4",
+                "content_type": "video/mp4"
+            }
+        }
+    )
+
+
+class UploadUrlResponse(BaseModel):
+    """Response model with a presigned upload URL"""
+    upload_url: str
+    public_url: str
+    expires_in: int
+    
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "upload_url": "https://your-bucket.s3.us-east-1.amazonaws.com/123e4567e89b12d3a456426614174000/uploads/clip_1_edited.mp4?X-Amz-Signature=...",
+                "public_url": "https://your-bucket.s3.us-east-1.amazonaws.com/123e4567e89b12d3a456426614174000/uploads/clip_1_edited.mp4",
+                "expires_in": 900
+            }
+        }
+    )
 
 
 class JobStatusResponse(BaseModel):
@@ -276,8 +363,8 @@ class JobStatusResponse(BaseModel):
     is_demo: Optional[bool] = False
     metadata: Optional[dict] = None
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "status": "complete",
                 "message": "Processing completed successfully",
@@ -298,4 +385,5 @@ class JobStatusResponse(BaseModel):
                 ],
                 "is_demo": False
             }
-        } 
\ No newline at end of file
+        }
+    )
\ No newline at end of file
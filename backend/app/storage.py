@@ -1,19 +1,65 @@
 import os
-import json
+import mmap
+import asyncio
+import functools
+import uuid
 import shutil
+import socket
+import contextlib
+import time
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Set, Tuple
 from abc import ABC, abstractmethod
 
+import orjson
+from cachetools import TLRUCache
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
 try:
     import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.config import Config as BotoConfig
     from botocore.exceptions import ClientError, NoCredentialsError
     S3_AVAILABLE = True
 except ImportError:
     S3_AVAILABLE = False
 
+try:
+    import asyncpg
+    ASYNCPG_AVAILABLE = True
+except ImportError:
+    ASYNCPG_AVAILABLE = False
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
 from .config import settings
 
+# One boto3 session per process; clients made from it share its credential and endpoint resolution
+_SESSION = boto3.session.Session() if S3_AVAILABLE else None
+
+
+def link_or_copy(src, dst) -> None:
+    """Hard-link dst to src so no bytes are copied, falling back to a copy"""
+    dst = Path(dst)
+    if dst.exists():
+        if os.path.samefile(src, dst):
+            return
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        # Across filesystems (or where hard links are refused) the bytes have to be copied
+        shutil.copy2(src, dst)
+
 
 class StorageBackend(ABC):
     """Abstract storage backend interface"""
@@ -38,10 +84,20 @@ class StorageBackend(ABC):
         """Check if a file exists"""
         pass
     
+    @abstractmethod
+    def list_files(self, prefix: str) -> Set[str]:
+        """List the paths of all files under a prefix"""
+        pass
+    
     @abstractmethod
     def get_public_url(self, remote_path: str) -> str:
         """Get the public URL for a file"""
         pass
+    
+    @abstractmethod
+    def get_upload_url(self, remote_path: str, content_type: str, expires_in: int) -> Optional[str]:
+        """Get a URL clients can PUT a file to directly, or None if unsupported"""
+        pass
 
 
 class LocalStorage(StorageBackend):
@@ -52,19 +108,19 @@ class LocalStorage(StorageBackend):
         self.base_dir.mkdir(exist_ok=True)
     
     def upload_file(self, local_path: str, remote_path: str) -> str:
-        """Copy file to local storage directory"""
+        """Link (or copy) file into the local storage directory"""
         dest_path = self.base_dir / remote_path
         dest_path.parent.mkdir(parents=True, exist_ok=True)
         
-        shutil.copy2(local_path, dest_path)
+        link_or_copy(local_path, dest_path)
         return f"/clips/{remote_path}"
     
     def download_file(self, remote_path: str, local_path: str) -> bool:
-        """Copy file from storage to local path"""
+        """Link (or copy) file from storage to local path"""
         try:
             source_path = self.base_dir / remote_path
             if source_path.exists():
-                shutil.copy2(source_path, local_path)
+                link_or_copy(source_path, local_path)
                 return True
             return False
         except Exception:
@@ -85,9 +141,24 @@ class LocalStorage(StorageBackend):
         """Check if file exists in local storage"""
         return (self.base_dir / remote_path).exists()
     
+    def list_files(self, prefix: str) -> Set[str]:
+        """List files under a prefix in local storage"""
+        root = self.base_dir / prefix
+        if not root.is_dir():
+            return set()
+        return {
+            str(Path(dirpath, name).relative_to(self.base_dir))
+            for dirpath, _, filenames in os.walk(root)
+            for name in filenames
+        }
+    
     def get_public_url(self, remote_path: str) -> str:
         """Get the public URL for local file serving"""
         return f"/clips/{remote_path}"
+    
+    def get_upload_url(self, remote_path: str, content_type: str, expires_in: int) -> Optional[str]:
+        """Direct uploads need S3; local files always go through the API"""
+        return None
 
 
 class S3Storage(StorageBackend):
@@ -100,22 +171,48 @@ class S3Storage(StorageBackend):
         self.bucket_name = bucket_name
         self.region = region
         self.base_url = base_url or f"https://{bucket_name}.s3.{region}.amazonaws.com"
+        # Large clips go up as parallel 16MB multipart chunks
+        self.transfer_config = TransferConfig(
+            multipart_chunksize=16 * 1024 * 1024,
+            max_concurrency=10,
+            use_threads=True
+        )
         
-        # Initialize S3 client
-        try:
-            self.s3_client = boto3.client(
-                's3',
-                region_name=region,
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
+        # Initialize S3 client; the pool is sized for parallel clip and multipart uploads
+        self._client = _SESSION.client(
+            's3',
+            region_name=region,
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            config=BotoConfig(
+                max_pool_connections=64,
+                retries={'max_attempts': 3, 'mode': 'adaptive'},
+                tcp_keepalive=True
             )
-            # Test connection
-            self.s3_client.head_bucket(Bucket=bucket_name)
-            print(f"✅ S3 storage initialized: {bucket_name}")
+        )
+        # Bucket access is checked on first use rather than at import time
+        self._bucket_checked = False
+        self._bucket_error: Optional[str] = None
+    
+    def _check_bucket(self) -> None:
+        """Verify bucket access once and remember the outcome"""
+        try:
+            self._client.head_bucket(Bucket=self.bucket_name)
+            print(f"✅ S3 storage initialized: {self.bucket_name}")
         except NoCredentialsError:
-            raise ValueError("AWS credentials not found. Set AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY")
+            self._bucket_error = "AWS credentials not found. Set AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY"
         except ClientError as e:
-            raise ValueError(f"S3 bucket access failed: {e}")
+            self._bucket_error = f"S3 bucket access failed: {e}"
+        self._bucket_checked = True
+    
+    @property
+    def s3_client(self):
+        """The S3 client, after the bucket has been checked"""
+        if not self._bucket_checked:
+            self._check_bucket()
+        if self._bucket_error is not None:
+            raise ValueError(self._bucket_error)
+        return self._client
     
     def upload_file(self, local_path: str, remote_path: str) -> str:
         """Upload file to S3"""
@@ -127,7 +224,8 @@ class S3Storage(StorageBackend):
             self.s3_client.upload_file(
                 local_path,
                 self.bucket_name,
-                remote_path
+                remote_path,
+                Config=self.transfer_config
                 # Note: No ACL set - bucket policy should handle public access
             )
             
@@ -182,60 +280,548 @@ class S3Storage(StorageBackend):
         except ClientError:
             return False
     
+    def list_files(self, prefix: str) -> Set[str]:
+        """List object keys under a prefix (one request per 1000 keys)"""
+        prefix = prefix.lstrip('/')
+        keys = set()
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            keys.update(item['Key'] for item in page.get('Contents', ()))
+        return keys
+    
     def get_public_url(self, remote_path: str) -> str:
         """Get the public URL for S3 file"""
         remote_path = remote_path.lstrip('/')
         return f"{self.base_url}/{remote_path}"
+    
+    def get_upload_url(self, remote_path: str, content_type: str, expires_in: int) -> Optional[str]:
+        """Presign a PUT so the client uploads straight to S3"""
+        remote_path = remote_path.lstrip('/')
+        return self.s3_client.generate_presigned_url(
+            'put_object',
+            Params={'Bucket': self.bucket_name, 'Key': remote_path, 'ContentType': content_type},
+            ExpiresIn=expires_in
+        )
+
+
+def _json_text(value: Any) -> str:
+    """orjson encoder for drivers that expect text rather than bytes"""
+    return orjson.dumps(value).decode()
+
+
+# Statuses of jobs that were accepted but have not produced a result yet
+UNFINISHED_STATUSES = ("pending", "processing")
+
+# Unfinished jobs are leased to the worker that holds them; a worker renews its
+# leases while it is alive, so a lapsed lease means the job's worker went away
+JOB_LEASE_SECONDS = 60
+
+
+class JobStore(ABC):
+    """Abstract job persistence interface"""
+    
+    @abstractmethod
+    async def put(self, job_id: str, record: Dict[str, Any]) -> None:
+        """Insert or replace a job record"""
+        pass
+    
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch a job record, or None if it does not exist"""
+        pass
+    
+    @abstractmethod
+    async def update(self, job_id: str, **fields: Any) -> None:
+        """Update individual fields of an existing job record"""
+        pass
+    
+    @abstractmethod
+    async def claim_unfinished(self, owner: str, lease_until: float, now: float) -> List[Tuple[str, Dict[str, Any]]]:
+        """Atomically lease every unfinished job whose lease has lapsed to owner, returning (job_id, record) for each"""
+        pass
+    
+    @abstractmethod
+    async def renew(self, job_ids: List[str], owner: str, lease_until: float) -> None:
+        """Extend the lease on the given jobs that owner still holds"""
+        pass
+
+
+def _lease_lapsed(record: Dict[str, Any], now: float) -> bool:
+    """Whether an unfinished job is free to be claimed"""
+    return record.get("status") in UNFINISHED_STATUSES and record.get("lease_until", 0) < now
+
+
+# Indented job files are easier to inspect while developing
+_JOB_FILE_OPTIONS = orjson.OPT_INDENT_2 if settings.DEBUG else 0
+
+
+class LocalJobStore(JobStore):
+    """JSON file job store (default for single-process deployments)"""
+    
+    def __init__(self, base_dir: str):
+        self.jobs_dir = Path(base_dir) / "jobs"
+        # One empty marker file per unfinished job, so claims never scan finished ones
+        self.pending_dir = self.jobs_dir / "pending"
+        # Writes run in threads, so serialize them to keep read-modify-write updates atomic
+        self._write_lock = asyncio.Lock()
+    
+    def _job_file(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.json"
+    
+    def _write(self, job_id: str, record: Dict[str, Any]) -> None:
+        """Write to a temp file and atomically swap it into place"""
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        job_file = self._job_file(job_id)
+        tmp_file = job_file.with_suffix(f".{os.getpid()}.tmp")
+        tmp_file.write_bytes(orjson.dumps(record, option=_JOB_FILE_OPTIONS))
+        os.replace(tmp_file, job_file)
+        self._track(job_id, record)
+    
+    def _track(self, job_id: str, record: Dict[str, Any]) -> None:
+        """Keep the job's pending/ marker in step with whether it is unfinished"""
+        marker = self.pending_dir / job_id
+        if record.get("status") in UNFINISHED_STATUSES:
+            self.pending_dir.mkdir(exist_ok=True)
+            marker.touch()
+        else:
+            marker.unlink(missing_ok=True)
+    
+    def _read(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._job_file(job_id), "rb") as job_file:
+                # Empty files cannot be mapped; treat them like a missing record
+                if os.fstat(job_file.fileno()).st_size == 0:
+                    return None
+                # Decode straight from the page cache instead of copying the file into a bytes object
+                with mmap.mmap(job_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    with memoryview(mapped) as view:
+                        return orjson.loads(view)
+        except FileNotFoundError:
+            return None
+    
+    def _update(self, job_id: str, fields: Dict[str, Any]) -> None:
+        # Under the lease lock, so a claim in another process can't write back a stale copy
+        with self._lease_lock():
+            record = self._read(job_id)
+            if record is None:
+                return
+            record.update(fields)
+            self._write(job_id, record)
+    
+    @contextlib.contextmanager
+    def _lease_lock(self):
+        """Serialize read-modify-writes across every process sharing the jobs directory"""
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.jobs_dir / ".lease.lock", "a") as lock_file:
+            if FCNTL_AVAILABLE:
+                # Released when the file is closed
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            yield
+    
+    def _claim_unfinished(self, owner: str, lease_until: float, now: float) -> List[Tuple[str, Dict[str, Any]]]:
+        jobs = []
+        with self._lease_lock():
+            if not self.pending_dir.is_dir():
+                return jobs
+            for marker in self.pending_dir.iterdir():
+                job_id = marker.name
+                record = self._read(job_id)
+                if record is None or record.get("status") not in UNFINISHED_STATUSES:
+                    # The job was deleted or finished without its marker being removed
+                    marker.unlink(missing_ok=True)
+                elif _lease_lapsed(record, now):
+                    record.update(owner=owner, lease_until=lease_until)
+                    self._write(job_id, record)
+                    jobs.append((job_id, record))
+        return jobs
+    
+    def _renew(self, job_ids: List[str], owner: str, lease_until: float) -> None:
+        with self._lease_lock():
+            for job_id in job_ids:
+                record = self._read(job_id)
+                if record is not None and record.get("owner") == owner:
+                    record["lease_until"] = lease_until
+                    self._write(job_id, record)
+    
+    # File I/O runs in a worker thread so polling clients never stall the event loop
+    
+    async def put(self, job_id: str, record: Dict[str, Any]) -> None:
+        """Write the job record to its JSON file"""
+        async with self._write_lock:
+            await asyncio.to_thread(self._write, job_id, record)
+    
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Read the job record from its JSON file"""
+        return await asyncio.to_thread(self._read, job_id)
+    
+    async def update(self, job_id: str, **fields: Any) -> None:
+        """Read-modify-write the job's JSON file"""
+        async with self._write_lock:
+            await asyncio.to_thread(self._update, job_id, fields)
+    
+    async def claim_unfinished(self, owner: str, lease_until: float, now: float) -> List[Tuple[str, Dict[str, Any]]]:
+        """Check only the pending/ jobs for lapsed leases under an exclusive file lock"""
+        async with self._write_lock:
+            return await asyncio.to_thread(self._claim_unfinished, owner, lease_until, now)
+    
+    async def renew(self, job_ids: List[str], owner: str, lease_until: float) -> None:
+        """Rewrite the lease of each held job file"""
+        async with self._write_lock:
+            await asyncio.to_thread(self._renew, job_ids, owner, lease_until)
+
+
+class PostgresJobStore(JobStore):
+    """PostgreSQL job store backed by the job_queue table"""
+    
+    # Columns with their own storage; every other job field lives in the data JSONB column
+    COLUMNS = ("status", "message", "results")
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS job_queue (
+            id UUID PRIMARY KEY,
+            status TEXT NOT NULL,
+            message TEXT,
+            results JSONB,
+            data JSONB NOT NULL DEFAULT '{}'::jsonb,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+        CREATE INDEX IF NOT EXISTS job_queue_pending_idx
+            ON job_queue (created_at) WHERE status = 'pending';
+        CREATE INDEX IF NOT EXISTS job_queue_processing_idx
+            ON job_queue (created_at) WHERE status = 'processing';
+    """
+    
+    def __init__(self, dsn: str):
+        if not ASYNCPG_AVAILABLE:
+            raise ImportError("asyncpg is required for PostgreSQL job storage. Install with: pip install asyncpg")
+        
+        self.dsn = dsn
+        self._pool = None
+    
+    @staticmethod
+    async def _init_connection(conn) -> None:
+        await conn.set_type_codec('jsonb', encoder=_json_text, decoder=orjson.loads, schema='pg_catalog')
+    
+    async def _get_pool(self):
+        """Create the connection pool and schema on first use"""
+        if self._pool is None:
+            pool = await asyncpg.create_pool(self.dsn, init=self._init_connection)
+            async with pool.acquire() as conn:
+                await conn.execute(self.SCHEMA)
+            self._pool = pool
+            print("✅ PostgreSQL job store initialized")
+        return self._pool
+    
+    @staticmethod
+    def _parse_id(job_id: str) -> Optional[uuid.UUID]:
+        try:
+            return uuid.UUID(job_id)
+        except ValueError:
+            return None
+    
+    def _split(self, record: Dict[str, Any]):
+        data = {k: v for k, v in record.items() if k not in self.COLUMNS}
+        return record.get("status"), record.get("message"), record.get("results"), data
+    
+    async def put(self, job_id: str, record: Dict[str, Any]) -> None:
+        """Insert the job row, replacing any existing row with the same id"""
+        job_uuid = self._parse_id(job_id)
+        if job_uuid is None:
+            raise ValueError(f"Invalid job id: {job_id}")
+        
+        pool = await self._get_pool()
+        await pool.execute(
+            """
+            INSERT INTO job_queue (id, status, message, results, data)
+            VALUES ($1, $2, $3, $4, $5)
+            ON CONFLICT (id) DO UPDATE
+                SET status = EXCLUDED.status, message = EXCLUDED.message,
+                    results = EXCLUDED.results, data = EXCLUDED.data
+            """,
+            job_uuid, *self._split(record)
+        )
+    
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Single primary-key lookup"""
+        job_uuid = self._parse_id(job_id)
+        if job_uuid is None:
+            return None
+        
+        pool = await self._get_pool()
+        row = await pool.fetchrow(
+            "SELECT status, message, results, data FROM job_queue WHERE id = $1",
+            job_uuid
+        )
+        if row is None:
+            return None
+        
+        return {**row["data"], "status": row["status"], "message": row["message"], "results": row["results"]}
+    
+    async def update(self, job_id: str, **fields: Any) -> None:
+        """Update only the given columns and merge the rest into data"""
+        job_uuid = self._parse_id(job_id)
+        if job_uuid is None or not fields:
+            return
+        
+        assignments = []
+        params: List[Any] = [job_uuid]
+        for column in self.COLUMNS:
+            if column in fields:
+                params.append(fields[column])
+                assignments.append(f"{column} = ${len(params)}")
+        
+        data = {k: v for k, v in fields.items() if k not in self.COLUMNS}
+        if data:
+            params.append(data)
+            assignments.append(f"data = data || ${len(params)}")
+        
+        pool = await self._get_pool()
+        await pool.execute(
+            f"UPDATE job_queue SET {', '.join(assignments)} WHERE id = $1",
+            *params
+        )
+    
+    async def claim_unfinished(self, owner: str, lease_until: float, now: float) -> List[Tuple[str, Dict[str, Any]]]:
+        """Lease lapsed jobs in one UPDATE; SKIP LOCKED leaves rows another worker is claiming to it"""
+        pool = await self._get_pool()
+        rows = await pool.fetch(
+            """
+            UPDATE job_queue
+            SET data = data || jsonb_build_object('owner', $2::text, 'lease_until', $3::float8)
+            WHERE id IN (
+                SELECT id FROM job_queue
+                WHERE status = ANY($1::text[])
+                    AND COALESCE((data->>'lease_until')::float8, 0) < $4
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, status, message, results, data, created_at
+            """,
+            list(UNFINISHED_STATUSES), owner, lease_until, now
+        )
+        # Oldest first, like the order the jobs were accepted in
+        return [
+            (row["id"].hex, {**row["data"], "status": row["status"], "message": row["message"], "results": row["results"]})
+            for row in sorted(rows, key=lambda row: row["created_at"])
+        ]
+    
+    async def renew(self, job_ids: List[str], owner: str, lease_until: float) -> None:
+        """Extend every held lease in one UPDATE"""
+        job_uuids = [job_uuid for job_uuid in map(self._parse_id, job_ids) if job_uuid is not None]
+        if not job_uuids:
+            return
+        pool = await self._get_pool()
+        await pool.execute(
+            """
+            UPDATE job_queue SET data = data || jsonb_build_object('lease_until', $3::float8)
+            WHERE id = ANY($1::uuid[]) AND data->>'owner' = $2
+            """,
+            job_uuids, owner, lease_until
+        )
+
+
+class RedisJobStore(JobStore):
+    """Redis job store keeping each job in a jobs:{id} hash"""
+    
+    # HSET only when the job already exists, in one round-trip, so a late update
+    # can't resurrect a deleted job as a partial hash
+    UPDATE_SCRIPT = """
+        if redis.call('EXISTS', KEYS[1]) == 1 then
+            return redis.call('HSET', KEYS[1], unpack(ARGV))
+        end
+        return 0
+    """
+    
+    # Unfinished job ids scored by lease_until, so claims never look at finished jobs
+    UNFINISHED_KEY = "jobs:unfinished"
+    
+    # Lease every indexed job whose lease has lapsed and return its id and fields.
+    # Fields hold JSON, so ARGV[1] is the encoded owner, ARGV[2] the new lease,
+    # ARGV[3] now, ARGV[4] the job key prefix and the rest the encoded unfinished statuses
+    CLAIM_SCRIPT = """
+        local claimed = {}
+        for _, job_id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[3])) do
+            local key = ARGV[4] .. job_id
+            local status = redis.call('HGET', key, 'status')
+            local unfinished = false
+            for i = 5, #ARGV do
+                if status == ARGV[i] then unfinished = true end
+            end
+            if unfinished then
+                redis.call('HSET', key, 'owner', ARGV[1], 'lease_until', ARGV[2])
+                redis.call('ZADD', KEYS[1], ARGV[2], job_id)
+                table.insert(claimed, job_id)
+                table.insert(claimed, redis.call('HGETALL', key))
+            else
+                redis.call('ZREM', KEYS[1], job_id)
+            end
+        end
+        return claimed
+    """
+    
+    # Extend the lease only while ARGV[1] still owns the job
+    RENEW_SCRIPT = """
+        if redis.call('HGET', KEYS[1], 'owner') == ARGV[1] then
+            redis.call('ZADD', KEYS[2], 'XX', ARGV[2], ARGV[3])
+            return redis.call('HSET', KEYS[1], 'lease_until', ARGV[2])
+        end
+        return 0
+    """
+    
+    def __init__(self, url: str):
+        if not REDIS_AVAILABLE:
+            raise ImportError("redis is required for Redis job storage. Install with: pip install redis")
+        
+        # unix:///path/to/redis.sock URLs connect over a Unix socket
+        self.redis = aioredis.Redis.from_url(url, decode_responses=True)
+        self._update = self.redis.register_script(self.UPDATE_SCRIPT)
+        self._claim = self.redis.register_script(self.CLAIM_SCRIPT)
+        self._renew = self.redis.register_script(self.RENEW_SCRIPT)
+        print("✅ Redis job store initialized")
+    
+    @staticmethod
+    def _key(job_id: str) -> str:
+        return f"jobs:{job_id}"
+    
+    async def put(self, job_id: str, record: Dict[str, Any]) -> None:
+        """Replace the job hash, JSON-encoding each field, and index it while unfinished"""
+        key = self._key(job_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.hset(key, mapping={k: orjson.dumps(v) for k, v in record.items()})
+            if record.get("status") in UNFINISHED_STATUSES:
+                pipe.zadd(self.UNFINISHED_KEY, {job_id: record.get("lease_until", 0)})
+            else:
+                pipe.zrem(self.UNFINISHED_KEY, job_id)
+            await pipe.execute()
+    
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch the whole job in a single HGETALL round-trip"""
+        fields = await self.redis.hgetall(self._key(job_id))
+        if not fields:
+            return None
+        return {k: orjson.loads(v) for k, v in fields.items()}
+    
+    async def update(self, job_id: str, **fields: Any) -> None:
+        """Set only the changed hash fields of an existing job, dropping it from the index once finished"""
+        if not fields:
+            return
+        args = [item for k, v in fields.items() for item in (k, orjson.dumps(v))]
+        if fields.get("status", "processing") in UNFINISHED_STATUSES:
+            await self._update(keys=[self._key(job_id)], args=args)
+            return
+        async with self.redis.pipeline(transaction=True) as pipe:
+            await self._update(keys=[self._key(job_id)], args=args, client=pipe)
+            pipe.zrem(self.UNFINISHED_KEY, job_id)
+            await pipe.execute()
+    
+    async def claim_unfinished(self, owner: str, lease_until: float, now: float) -> List[Tuple[str, Dict[str, Any]]]:
+        """Claim every lapsed job from the unfinished index in one atomic script call"""
+        args = [
+            orjson.dumps(owner), orjson.dumps(lease_until), now, self._key(""),
+            *map(orjson.dumps, UNFINISHED_STATUSES)
+        ]
+        claimed = await self._claim(keys=[self.UNFINISHED_KEY], args=args)
+        jobs = []
+        for job_id, fields in zip(claimed[::2], claimed[1::2]):
+            jobs.append((job_id, {k: orjson.loads(v) for k, v in zip(fields[::2], fields[1::2])}))
+        return jobs
+    
+    async def renew(self, job_ids: List[str], owner: str, lease_until: float) -> None:
+        """Extend each held lease, all in one pipelined round-trip"""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for job_id in job_ids:
+                await self._renew(
+                    keys=[self._key(job_id), self.UNFINISHED_KEY],
+                    args=[orjson.dumps(owner), orjson.dumps(lease_until), job_id],
+                    client=pipe
+                )
+            await pipe.execute()
+
+
+# Client uploads get their own prefix under the job, so a presigned URL can never
+# overwrite the clips the pipeline publishes
+UPLOADS_DIR = "uploads"
 
 
 class JobManager:
     """Handles job persistence with configurable storage backend"""
     
-    def __init__(self, storage: StorageBackend):
+    def __init__(self, storage: StorageBackend, store: JobStore):
         self.storage = storage
-        self.jobs: Dict[str, Dict[str, Any]] = {}
-        self._load_all_jobs()
+        self.store = store
+        # Bounded in-memory cache in front of the job store. Finished jobs never
+        # change, so they are kept for JOB_TTL_SECONDS; in-flight jobs expire after
+        # JOB_ACTIVE_TTL_SECONDS so progress written by other workers shows up.
+        # Only touched from the event loop thread, so no extra locking is needed.
+        self.jobs: TLRUCache = TLRUCache(maxsize=settings.MAX_JOBS_CACHE, ttu=self._time_to_use)
+        # Store reads in flight, so concurrent polls for an uncached job share one read
+        self._loading: Dict[str, asyncio.Future] = {}
+        # Identifies this worker process in job leases, and the unfinished jobs it holds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._held: Set[str] = set()
     
-    def _load_all_jobs(self):
-        """Load all jobs from storage on startup"""
-        try:
-            # Try to load jobs from storage if available
-            # For now, we'll use local JSON files for job metadata
-            # In production, you might want to use a database
-            pass
-        except Exception as e:
-            print(f"⚠️ Could not load existing jobs: {e}")
+    @staticmethod
+    def _time_to_use(job_id: str, job_data: Dict[str, Any], now: float) -> float:
+        if job_data.get("status") in UNFINISHED_STATUSES:
+            return now + settings.JOB_ACTIVE_TTL_SECONDS
+        return now + settings.JOB_TTL_SECONDS
+    
+    @property
+    def cached_jobs(self) -> int:
+        """Number of jobs in this worker's in-memory cache, not the total in the job store"""
+        return len(self.jobs)
     
-    def save_job(self, job_id: str, job_data: Dict[str, Any]):
-        """Save job data"""
+    async def save_job(self, job_id: str, job_data: Dict[str, Any]):
+        """Store a new job; later changes go through update_job so readers never see a swapped record"""
+        job_data["version"] = time.time_ns()
+        if job_data.get("status") in UNFINISHED_STATUSES:
+            # Accepted jobs are queued here, so this worker holds their lease
+            job_data.update(owner=self.owner, lease_until=time.time() + JOB_LEASE_SECONDS)
+            self._held.add(job_id)
         self.jobs[job_id] = job_data
         
-        # Save to local JSON for persistence (consider database for production)
         try:
-            jobs_dir = Path(settings.LOCAL_OUTPUT_DIR) / "jobs"
-            jobs_dir.mkdir(exist_ok=True)
-            
-            job_file = jobs_dir / f"{job_id}.json"
-            with open(job_file, 'w') as f:
-                json.dump(job_data, f, indent=2)
+            await self.store.put(job_id, job_data)
             print(f"💾 Saved job {job_id}")
         except Exception as e:
             print(f"❌ Failed to save job {job_id}: {e}")
     
-    def load_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+    async def update_job(self, job_id: str, **fields: Any):
+        """Update individual job fields without rewriting the whole record"""
+        # Every change gets a new version (a timestamp, so workers that don't have the
+        # job cached can still bump it); /status uses it as the ETag
+        fields["version"] = time.time_ns()
+        if fields.get("status", "processing") not in UNFINISHED_STATUSES:
+            self._held.discard(job_id)
+        job_data = self.jobs.get(job_id)
+        if job_data is not None:
+            job_data.update(fields)
+            if "status" in fields:
+                # Re-insert so the entry's lifetime follows the new status
+                self.jobs[job_id] = job_data
+        
+        try:
+            await self.store.update(job_id, **fields)
+        except Exception as e:
+            print(f"❌ Failed to update job {job_id}: {e}")
+    
+    async def load_job(self, job_id: str) -> Optional[Dict[str, Any]]:
         """Load job data"""
         # Check memory first
-        if job_id in self.jobs:
-            return self.jobs[job_id]
+        job_data = self.jobs.get(job_id)
+        if job_data is not None:
+            return job_data
+        
+        # Fall back to the job store
+        loading = self._loading.get(job_id)
+        if loading is None:
+            loading = asyncio.ensure_future(self.store.get(job_id))
+            self._loading[job_id] = loading
+            loading.add_done_callback(lambda _: self._loading.pop(job_id, None))
         
-        # Try to load from file
         try:
-            jobs_dir = Path(settings.LOCAL_OUTPUT_DIR) / "jobs"
-            job_file = jobs_dir / f"{job_id}.json"
-            
-            if job_file.exists():
-                with open(job_file, 'r') as f:
-                    job_data = json.load(f)
+            job_data = await asyncio.shield(loading)
+            if job_data is not None:
                 self.jobs[job_id] = job_data  # Cache in memory
                 return job_data
         except Exception as e:
@@ -243,18 +829,57 @@ class JobManager:
         
         return None
     
+    async def refresh_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Load job data from the job store, replacing any cached copy"""
+        self.jobs.pop(job_id, None)
+        return await self.load_job(job_id)
+    
+    async def claim_unfinished_jobs(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Take over jobs that were accepted but whose worker went away, e.g. killed by a restart"""
+        now = time.time()
+        try:
+            jobs = await self.store.claim_unfinished(self.owner, now + JOB_LEASE_SECONDS, now)
+        except Exception as e:
+            print(f"❌ Failed to claim unfinished jobs: {e}")
+            return []
+        self._held.update(job_id for job_id, _ in jobs)
+        return jobs
+    
+    async def renew_leases(self) -> None:
+        """Keep the leases on this worker's unfinished jobs from lapsing"""
+        if not self._held:
+            return
+        try:
+            await self.store.renew(list(self._held), self.owner, time.time() + JOB_LEASE_SECONDS)
+        except Exception as e:
+            print(f"❌ Failed to renew job leases: {e}")
+    
     def upload_video(self, local_path: str, job_id: str, filename: str) -> str:
         """Upload a video file and return public URL"""
         remote_path = f"{job_id}/{filename}"
         return self.storage.upload_file(local_path, remote_path)
     
+    def job_files(self, job_id: str) -> Set[str]:
+        """Stored file paths for a job, from one prefix listing (blocking)"""
+        return self.storage.list_files(f"{job_id}/")
+    
     def get_video_url(self, job_id: str, filename: str) -> str:
         """Get public URL for a video file"""
         remote_path = f"{job_id}/{filename}"
         return self.storage.get_public_url(remote_path)
+    
+    def upload_exists(self, job_id: str, filename: str) -> bool:
+        """Check whether a client upload is already in storage"""
+        return self.storage.file_exists(f"{job_id}/{UPLOADS_DIR}/{filename}")
+    
+    def get_upload_url(self, job_id: str, filename: str, content_type: str, expires_in: int) -> Optional[str]:
+        """Get a direct-to-storage upload URL for a client upload"""
+        remote_path = f"{job_id}/{UPLOADS_DIR}/{filename}"
+        return self.storage.get_upload_url(remote_path, content_type, expires_in)
 
 
 # Global storage manager
+@functools.lru_cache(maxsize=1)
 def get_storage() -> StorageBackend:
     """Get the configured storage backend"""
     if settings.USE_S3 and settings.S3_BUCKET:
@@ -267,6 +892,16 @@ def get_storage() -> StorageBackend:
         return LocalStorage(settings.LOCAL_OUTPUT_DIR)
 
 
+def get_job_store() -> JobStore:
+    """Get the configured job store"""
+    if settings.DATABASE_URL:
+        return PostgresJobStore(settings.DATABASE_URL)
+    elif settings.REDIS_URL:
+        return RedisJobStore(settings.REDIS_URL)
+    else:
+        return LocalJobStore(settings.LOCAL_OUTPUT_DIR)
+
+
 # Global job manager instance
 storage_backend = get_storage()
-job_manager = JobManager(storage_backend) 
\ No newline at end of file
+job_manager = JobManager(storage_backend, get_job_store()) 
\ No newline at end of file
@@ -1,8 +1,22 @@
 """
 Video processing module for YouTube to Shorts conversion.
 Contains all the video analysis, transcription, and clip generation functionality.
+
+The pipeline pulls in heavy dependencies (whisper/torch, yt-dlp), so it is
+resolved lazily on first attribute access instead of at package import time.
 """
 
-from .pipeline import run_processing_pipeline
+__all__ = ['run_processing_pipeline', 'run_pipeline_job']
+
+
+def run_pipeline_job(job_id: str, url: str, prompt: str, output_dir: str):
+    """Run the pipeline for one job; submitted to worker processes so only they import it"""
+    from .pipeline import run_processing_pipeline
+    return run_processing_pipeline(job_id, url, prompt, output_dir)
+
 
-__all__ = ['run_processing_pipeline'] 
\ No newline at end of file
+def __getattr__(name):
+    if name == 'run_processing_pipeline':
+        from .pipeline import run_processing_pipeline
+        return run_processing_pipeline
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,174 +3,219 @@ Caption burning processor for YouTube Shorts style captions.
 """
 
 import os
+import hashlib
+import functools
 import subprocess
 import tempfile
 import json
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Union
+
+import numpy as np
+from pydantic import TypeAdapter
+
 from ..schemas import CaptionSegment, CaptionStyle
+from ..storage import link_or_copy
+from .ffmpeg import SOFTWARE_ENCODER, VideoEncoder, encode_threads, ffmpeg_path, video_encoder
+
+
+_CAPTIONS_ADAPTER = TypeAdapter(List[CaptionSegment])
+
+
+class CaptionSegmentsSoA:
+    """Caption timings as parallel arrays, so timing math runs in NumPy rather than per segment"""
+    
+    __slots__ = ('starts', 'ends', 'texts')
+    
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, texts: List[str]):
+        self.starts = starts
+        self.ends = ends
+        self.texts = texts
+    
+    @classmethod
+    def from_pydantic(cls, captions: List[CaptionSegment]) -> 'CaptionSegmentsSoA':
+        """Build the arrays from caption models"""
+        count = len(captions)
+        # float64: float32 cannot hold millisecond precision over an hour-long video
+        starts = np.fromiter((caption.start for caption in captions), dtype=np.float64, count=count)
+        ends = np.fromiter((caption.end for caption in captions), dtype=np.float64, count=count)
+        return cls(starts, ends, [caption.text for caption in captions])
+    
+    def __len__(self) -> int:
+        return len(self.texts)
+    
+    def sorted(self) -> 'CaptionSegmentsSoA':
+        """Order segments by start time (stable, so equal starts keep their request order)"""
+        order = np.argsort(self.starts, kind='stable')
+        return CaptionSegmentsSoA(self.starts[order], self.ends[order], [self.texts[i] for i in order.tolist()])
+
+
+# Script resolution the styles are laid out in (libass scales it to the video);
+# matches what ffmpeg assumes for SRT input, so font sizes and margins keep their meaning
+PLAY_RES_X = 384
+PLAY_RES_Y = 288
+
+# Alignment (numpad layout) and vertical margin per caption position - optimized for YouTube Shorts
+POSITION_LAYOUT = {
+    'top': (8, 60),  # Top with good margin
+    'center': (2, 0),  # Center
+    'bottom': (2, 200)  # Much lower bottom position
+}
+
+
+# Every lower-case two-digit hex byte to its upper-case spelling
+_HEX_BYTES = {f"{i:02x}": f"{i:02X}" for i in range(256)}
+
+
+@functools.lru_cache(maxsize=256)
+def ass_color(hex_color: str, alpha: int = 0) -> str:
+    """Convert #RRGGBB to an ASS &HAABBGGRR colour (alpha 0 is opaque; anything unparseable is black)."""
+    # Lowercased first so any mix of cases (#aBcDeF) is accepted, like int(..., 16)
+    hex_color = hex_color.lstrip('#').lower()
+    red = green = blue = "00"
+    if len(hex_color) == 6:
+        try:
+            red, green, blue = _HEX_BYTES[hex_color[0:2]], _HEX_BYTES[hex_color[2:4]], _HEX_BYTES[hex_color[4:6]]
+        except KeyError:
+            pass
+    return f"&H{min(max(alpha, 0), 255):02X}{blue}{green}{red}"
+
 
+# Everything in a Dialogue line except its times and text is the same for every caption
+_DIALOGUE_TEMPLATE = "Dialogue: 0,%s,%s,ShortsCaption,,0,0,0,,%s\n"
 
-def create_subtitle_file(captions: List[CaptionSegment], output_path: str) -> str:
+# Caption text to ASS event text: explicit line breaks, no stray carriage returns
+_ASS_ESCAPE = str.maketrans({'\n': '\\N', '\r': None})
+
+
+def animation_prefix(style: CaptionStyle) -> str:
+    """Build the ASS override tags shared by every caption of a style, so libass renders every effect in one pass."""
+    if style.animation == 'pop':
+        # Scale up to 150% and back over the first 200ms
+        return "{\\t(0,100,\\fscx150\\fscy150)\\t(100,200,\\fscx100\\fscy100)}"
+    if style.animation == 'slide':
+        # Slide in from the right edge over the first 300ms
+        alignment, margin_v = POSITION_LAYOUT[style.position]
+        y = margin_v if alignment == 8 else PLAY_RES_Y - margin_v
+        return f"{{\\move({PLAY_RES_X * 3 // 2},{y},{PLAY_RES_X // 2},{y},0,300)}}"
+    return ""
+
+
+def word_reveal_centiseconds(durations: np.ndarray, word_counts: np.ndarray) -> np.ndarray:
+    """Per-caption time each word takes to appear, for every caption at once."""
+    # Spread the words over the caption, between 0.2 and 0.5 seconds per word
+    # (half a second when the caption has no duration)
+    per_word = np.divide(durations, word_counts, out=np.full(len(durations), 0.5), where=(durations > 0) & (word_counts > 0))
+    return np.round(np.clip(per_word, 0.2, 0.5) * 100).astype(np.int64)
+
+
+def typewriter_text(words: List[str], centiseconds: int) -> str:
+    """Time each word with karaoke tags so the caption is revealed one word at a time."""
+    # Unrevealed words use the fully transparent secondary colour, \ko hides their outline too.
+    # Every word shares the same tag, so the whole line is a single join
+    tag = f"{{\\ko{centiseconds}}}"
+    return tag + f" {tag}".join(words)
+
+
+def create_subtitle_file(captions: List[CaptionSegment], output_path: str, style: Optional[CaptionStyle] = None) -> str:
     """Create an ASS subtitle file with YouTube Shorts styling."""
+    style = style or CaptionStyle()
+    alignment, margin_v = POSITION_LAYOUT[style.position]
+    if style.backgroundColor != 'transparent':
+        back_colour = ass_color(style.backgroundColor, round((1 - style.backgroundOpacity) * 255))
+    else:
+        back_colour = "&HFF000000"
     
     ass_content = f"""[Script Info]
 Title: YouTube Shorts Captions
 ScriptType: v4.00+
+PlayResX: {PLAY_RES_X}
+PlayResY: {PLAY_RES_Y}
+ScaledBorderAndShadow: yes
 
 [V4+ Styles]
 Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
-Style: ShortsCaption,Arial Black,{{}},&H00FFFFFF,&H000000FF,&H00000000,&H80000000,1,0,0,0,100,100,0,0,1,3,0,2,10,10,10,1
+Style: ShortsCaption,Arial Black,{style.fontSize},{ass_color(style.fontColor)},&HFF000000,{ass_color(style.outlineColor)},{back_colour},1,0,0,0,100,100,2,0,1,{style.outlineWidth},0,{alignment},10,10,{margin_v},1
 
 [Events]
 Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
 """
     
-    for caption in captions:
-        start_time = seconds_to_ass_time(caption.start)
-        end_time = seconds_to_ass_time(caption.end)
-        text = caption.text.replace('\n', '\\N')
-        ass_content += f"Dialogue: 0,{start_time},{end_time},ShortsCaption,,0,0,0,,{text}\n"
+    # Start-time order, with every timestamp formatted in one vectorized pass
+    segments = CaptionSegmentsSoA.from_pydantic(captions).sorted()
+    start_times = format_ass_times(segments.starts)
+    end_times = format_ass_times(segments.ends)
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(ass_content)
+    if style.animation == 'typewriter':
+        # Word timings for every caption come from one vectorized pass
+        words_per_caption = [text.split() for text in segments.texts]
+        word_counts = np.fromiter(map(len, words_per_caption), dtype=np.int64, count=len(words_per_caption))
+        reveal = word_reveal_centiseconds(segments.ends - segments.starts, word_counts).tolist()
+        event_texts = (
+            typewriter_text(words, centiseconds) if words else text
+            for words, centiseconds, text in zip(words_per_caption, reveal, segments.texts)
+        )
+    else:
+        # Style-derived tags are built once, not per caption
+        prefix = animation_prefix(style)
+        event_texts = (prefix + text.translate(_ASS_ESCAPE) for text in segments.texts)
+    
+    # Encode the whole file once and hand it to the kernel directly, skipping the
+    # text encoder and buffered writer
+    events = map(_DIALOGUE_TEMPLATE.__mod__, zip(start_times, end_times, event_texts))
+    blob = memoryview("".join((ass_content, *events)).encode('utf-8'))
+    fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        while blob:
+            blob = blob[os.write(fd, blob):]
+    finally:
+        os.close(fd)
     
     return output_path
 
 
-def seconds_to_ass_time(seconds: float) -> str:
-    """Convert seconds to ASS time format (H:MM:SS.CC)."""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = seconds % 60
-    return f"{hours}:{minutes:02d}:{secs:05.2f}"
+# ASS timestamps have a single hour digit
+ASS_MAX_CENTISECONDS = 10 * 3600 * 100 - 1
 
+# Character columns of "H:MM:SS.CC" and the separators between them
+_ASS_TIME_TEMPLATE = np.frombuffer(b"0:00:00.00", dtype=np.uint8)
 
-def create_youtube_shorts_filter(captions: List[CaptionSegment], style: CaptionStyle) -> str:
-    """Create FFmpeg filter for YouTube Shorts style captions."""
-    
-    # Convert colors from hex to BGR for FFmpeg
-    def hex_to_bgr(hex_color: str) -> str:
-        hex_color = hex_color.lstrip('#')
-        r = int(hex_color[0:2], 16)
-        g = int(hex_color[2:4], 16)
-        b = int(hex_color[4:6], 16)
-        return f"&H00{b:02X}{g:02X}{r:02X}"
-    
-    # Position mapping
-    position_map = {
-        'top': 8,     # Top center
-        'center': 2,  # Middle center  
-        'bottom': 2   # Bottom center (will adjust with MarginV)
-    }
-    
-    margin_v = 50 if style.position == 'bottom' else 10
-    alignment = position_map[style.position]
-    
-    # Background color with opacity
-    bg_color = hex_to_bgr(style.backgroundColor) if style.backgroundColor != 'transparent' else '&H00000000'
-    bg_alpha = int((1 - style.backgroundOpacity) * 255)
-    bg_color_alpha = f"&H{bg_alpha:02X}{style.backgroundColor[5:7] if len(style.backgroundColor) >= 7 else '00'}{style.backgroundColor[3:5] if len(style.backgroundColor) >= 5 else '00'}{style.backgroundColor[1:3] if len(style.backgroundColor) >= 3 else '00'}"
-    
-    outline_color = hex_to_bgr(style.outlineColor)
-    font_color = hex_to_bgr(style.fontColor)
+
+def format_ass_times(seconds: np.ndarray) -> List[str]:
+    """Format an array of seconds as ASS timestamps (H:MM:SS.CC), writing the ASCII digits in one pass."""
+    centiseconds = np.clip(np.round(seconds * 100), 0, ASS_MAX_CENTISECONDS).astype(np.int64)
+    hours, centiseconds = np.divmod(centiseconds, 360000)
+    minutes, centiseconds = np.divmod(centiseconds, 6000)
+    secs, centiseconds = np.divmod(centiseconds, 100)
     
-    # Create the subtitle filter
-    drawtext_filters = []
+    # One row of ASCII bytes per timestamp; digit columns are filled from the time parts
+    chars = np.tile(_ASS_TIME_TEMPLATE, (len(centiseconds), 1))
+    for column, value in ((0, hours), (2, minutes // 10), (3, minutes % 10), (5, secs // 10),
+                          (6, secs % 10), (8, centiseconds // 10), (9, centiseconds % 10)):
+        chars[:, column] += value.astype(np.uint8)
     
-    for i, caption in enumerate(captions):
-        start_time = caption.start
-        end_time = caption.end
-        text = caption.text.replace("'", "\\'").replace(":", "\\:")
-        
-        # Animation effects
-        if style.animation == 'pop':
-            # Scale animation
-            scale_filter = f"if(between(t,{start_time},{start_time+0.2}),1+0.5*sin(2*PI*(t-{start_time})/0.2),1)"
-        elif style.animation == 'slide':
-            # Slide in from side
-            x_offset = f"if(between(t,{start_time},{start_time+0.3}),w*(1-(t-{start_time})/0.3),(w-text_w)/2)"
-        elif style.animation == 'typewriter':
-            # Typewriter effect (simplified)
-            text_progress = f"if(between(t,{start_time},{end_time}),floor((t-{start_time})/({end_time-start_time})*{len(text)}),{len(text)})"
-        else:
-            scale_filter = "1"
-            x_offset = "(w-text_w)/2"
-        
-        # Positioning
-        if style.position == 'top':
-            y_pos = f"{margin_v}+{style.fontSize}"
-        elif style.position == 'center':
-            y_pos = "(h-text_h)/2"
-        else:  # bottom
-            y_pos = f"h-text_h-{margin_v}"
-        
-        if style.animation != 'slide':
-            x_offset = "(w-text_w)/2"
-        
-        # Build the drawtext filter
-        filter_parts = [
-            f"drawtext=enable='between(t,{start_time},{end_time})'",
-            f"text='{text}'",
-            f"fontfile=/System/Library/Fonts/Arial\\ Black.ttf",
-            f"fontsize={style.fontSize}",
-            f"fontcolor={font_color}",
-            f"x={x_offset}",
-            f"y={y_pos}",
-            f"borderw={style.outlineWidth}",
-            f"bordercolor={outline_color}",
-            f"box=1",
-            f"boxcolor={bg_color_alpha}",
-            f"boxborderw=5"
-        ]
-        
-        if style.animation == 'pop':
-            filter_parts.append(f"fontsize={style.fontSize}*{scale_filter}")
-        
-        drawtext_filters.append(":".join(filter_parts))
-    
-    # Combine all drawtext filters
-    return ",".join(drawtext_filters)
+    text = chars.tobytes().decode('ascii')
+    width = len(_ASS_TIME_TEMPLATE)
+    return [text[i:i + width] for i in range(0, len(text), width)]
 
 
-def create_word_by_word_captions(captions: List[CaptionSegment]) -> List[CaptionSegment]:
-    """Break captions into word-by-word segments for typewriter effect."""
-    word_captions = []
-    
-    for caption in captions:
-        words = caption.text.split()
-        if not words:
-            continue
-            
-        caption_duration = caption.end - caption.start
-        words_per_second = len(words) / caption_duration if caption_duration > 0 else 2
-        word_duration = min(0.5, max(0.2, 1 / words_per_second))  # Between 0.2 and 0.5 seconds per word
-        
-        current_time = caption.start
-        accumulated_text = ""
-        
-        for i, word in enumerate(words):
-            accumulated_text += word
-            if i < len(words) - 1:
-                accumulated_text += " "
-            
-            # Calculate end time for this word segment
-            next_time = min(current_time + word_duration, caption.end)
-            
-            word_captions.append(CaptionSegment(
-                start=current_time,
-                end=next_time,
-                text=accumulated_text,
-                confidence=caption.confidence
-            ))
-            
-            current_time = next_time
-            
-            # If we've reached the end time, break
-            if current_time >= caption.end:
-                break
-    
-    return word_captions
+def burn_command(input_video: str, subtitle_file: str, output_video: str, encoder: VideoEncoder) -> List[str]:
+    """Build the FFmpeg command that burns an ASS file into a video with the given encoder."""
+    # Binary resolved once per process; -nostdin so ffmpeg doesn't set up
+    # interactive terminal handling per launch
+    return [
+        ffmpeg_path() or 'ffmpeg', '-nostdin', '-y', '-hide_banner', '-loglevel', 'error', '-nostats',
+        *encoder.input_args,
+        '-i', input_video,
+        '-vf', ','.join((f"subtitles={subtitle_file}", *encoder.filters)),
+        '-c:a', 'copy',
+        *encoder.output_args,
+        # Burns run encode_workers() at a time, so a libx264 burn takes only its share of the cores
+        *(('-threads', str(encode_threads())) if encoder is SOFTWARE_ENCODER else ()),
+        # Write the moov atom up front so the captioned preview plays before it finishes downloading
+        '-movflags', '+faststart',
+        output_video
+    ]
 
 
 def burn_captions_ffmpeg(
@@ -182,65 +227,28 @@ def burn_captions_ffmpeg(
     """Burn captions into video using FFmpeg with YouTube Shorts styling."""
     
     try:
-        # Convert to word-by-word captions if typewriter animation is selected
-        if style.animation == 'typewriter':
-            captions = create_word_by_word_captions(captions)
-        
-        # Create a temporary subtitle file
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.srt', delete=False) as f:
+        # One ASS file carries the styling and animations, so ffmpeg runs a single subtitles filter
+        with tempfile.NamedTemporaryFile(suffix='.ass', delete=False) as f:
             subtitle_file = f.name
-            
-            # Write SRT format subtitles
-            for i, caption in enumerate(captions, 1):
-                start_time = format_srt_time(caption.start)
-                end_time = format_srt_time(caption.end)
-                f.write(f"{i}\n{start_time} --> {end_time}\n{caption.text}\n\n")
-        
-        # Position mapping for subtitle filter - optimized for YouTube Shorts
-        position_map = {
-            'top': 'Alignment=8,MarginV=60',  # Top with good margin
-            'center': 'Alignment=2,MarginV=0',  # Center
-            'bottom': 'Alignment=2,MarginV=200'  # Much lower bottom position
-        }
+        create_subtitle_file(captions, subtitle_file, style)
         
-        # Convert hex colors to decimal for subtitles filter
-        def hex_to_decimal(hex_color: str) -> int:
-            return int(hex_color.lstrip('#'), 16)
-        
-        font_color = hex_to_decimal(style.fontColor)
-        outline_color = hex_to_decimal(style.outlineColor)
-        bg_color = hex_to_decimal(style.backgroundColor) if style.backgroundColor != 'transparent' else 0
-        
-        # Build subtitle style optimized for mobile viewing
-        subtitle_style = (
-            f"FontName=Arial Black,"
-            f"FontSize={style.fontSize},"
-            f"PrimaryColour=&H{font_color:08X},"
-            f"OutlineColour=&H{outline_color:08X},"
-            f"BackColour=&H{bg_color:08X},"
-            f"Bold=1,"
-            f"Outline={style.outlineWidth},"
-            f"Shadow=0,"  # No shadow for cleaner look
-            f"BorderStyle=1,"  # Outline only
-            f"Spacing=2,"  # Slight letter spacing for readability
-            f"{position_map[style.position]}"
+        encoder = video_encoder()
+        print(f"🎬 Running FFmpeg caption burn with {style.animation} animation ({encoder.name})")
+        print(f"📍 Position: {style.position}, Font: {style.fontSize}px, Animation: {style.animation}")
+        # Binary stderr, only decoded if the burn fails
+        result = subprocess.run(
+            burn_command(input_video, subtitle_file, output_video, encoder),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE
         )
         
-        # FFmpeg command for burning subtitles
-        cmd = [
-            'ffmpeg', '-y',
-            '-i', input_video,
-            '-vf', f"subtitles={subtitle_file}:force_style='{subtitle_style}'",
-            '-c:a', 'copy',
-            '-c:v', 'libx264',
-            '-preset', 'fast',
-            '-crf', '23',
-            output_video
-        ]
-        
-        print(f"🎬 Running FFmpeg caption burn with word-by-word animation")
-        print(f"📍 Position: {style.position}, Font: {style.fontSize}px, Animation: {style.animation}")
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0 and encoder is not SOFTWARE_ENCODER:
+            print(f"⚠️ {encoder.name} burn failed, retrying with libx264: {result.stderr.decode(errors='replace')}")
+            result = subprocess.run(
+                burn_command(input_video, subtitle_file, output_video, SOFTWARE_ENCODER),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE
+            )
         
         # Clean up temporary file
         os.unlink(subtitle_file)
@@ -249,7 +257,7 @@ def burn_captions_ffmpeg(
             print(f"✅ Successfully burned {len(captions)} caption segments into {output_video}")
             return True
         else:
-            print(f"❌ FFmpeg failed: {result.stderr}")
+            print(f"❌ FFmpeg failed: {result.stderr.decode(errors='replace')}")
             return False
             
     except Exception as e:
@@ -257,20 +265,49 @@ def burn_captions_ffmpeg(
         return False
 
 
-def format_srt_time(seconds: float) -> str:
-    """Format seconds as SRT timestamp (HH:MM:SS,mmm)."""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    millis = int((seconds % 1) * 1000)
-    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+# Finished burns keyed by source file version, captions and style, bounded by total size
+BURN_CACHE_DIR = Path(os.getenv('XDG_CACHE_HOME') or Path.home() / '.cache') / 'hackai' / 'captioned'
+BURN_CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+
+def _burn_cache_key(input_video_path: str, captions: List[CaptionSegment], style: CaptionStyle) -> str:
+    """Hash everything that determines a burn's output"""
+    stat = os.stat(input_video_path)
+    digest = hashlib.blake2b(f"{stat.st_mtime_ns}|{stat.st_size}|".encode(), digest_size=16)
+    digest.update(_CAPTIONS_ADAPTER.dump_json(captions))
+    digest.update(style.model_dump_json().encode())
+    return digest.hexdigest()
+
+
+def _store_burn(output_video_path: str, cached_video: Path) -> None:
+    """Keep a finished burn for reuse, dropping the oldest entries beyond BURN_CACHE_MAX_BYTES"""
+    try:
+        BURN_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Only a hard link is free; when the cache is on another filesystem a copy
+        # would double the disk used by every burn, so the burn isn't cached
+        os.link(output_video_path, cached_video)
+    except OSError as e:
+        print(f"⚠️ Not caching caption burn: {e}")
+        return
+    
+    try:
+        entries = [(entry.path, entry.stat()) for entry in os.scandir(BURN_CACHE_DIR)]
+        entries.sort(key=lambda item: item[1].st_mtime)
+        total = sum(stat.st_size for _, stat in entries)
+        for path, stat in entries:
+            if total <= BURN_CACHE_MAX_BYTES:
+                break
+            os.unlink(path)
+            total -= stat.st_size
+    except OSError as e:
+        print(f"⚠️ Could not trim caption burn cache: {e}")
 
 
 def apply_captions_to_video(
     input_video_path: str,
     output_video_path: str,
-    captions: List[Dict[str, Any]],
-    style: Dict[str, Any]
+    captions: Sequence[Union[CaptionSegment, Dict[str, Any]]],
+    style: Union[CaptionStyle, Dict[str, Any]]
 ) -> bool:
     """
     Apply captions to a video file with YouTube Shorts styling.
@@ -278,21 +315,32 @@ def apply_captions_to_video(
     Args:
         input_video_path: Path to input video
         output_video_path: Path for output video with captions
-        captions: List of caption segments
-        style: Caption styling options
+        captions: List of caption segments (models are used as-is, dicts are validated)
+        style: Caption styling options (model or dict)
         
     Returns:
         True if successful, False otherwise
     """
     
     try:
-        # Convert dictionaries to Pydantic models
-        caption_segments = [CaptionSegment(**cap) for cap in captions]
-        caption_style = CaptionStyle(**style)
+        # Validate the whole list in one pydantic-core call; already-validated models pass through
+        caption_segments = _CAPTIONS_ADAPTER.validate_python(captions)
+        caption_style = CaptionStyle.model_validate(style)
         
         # Ensure output directory exists
         os.makedirs(os.path.dirname(output_video_path), exist_ok=True)
         
+        # The output may be a hard link into the burn cache; write a new file instead of truncating it
+        Path(output_video_path).unlink(missing_ok=True)
+        
+        # Same source, captions and style as an earlier burn: reuse that video
+        cache_key = _burn_cache_key(input_video_path, caption_segments, caption_style)
+        cached_video = BURN_CACHE_DIR / f"{cache_key}.mp4"
+        if cached_video.exists():
+            print(f"📦 Reusing cached caption burn for {os.path.basename(input_video_path)}")
+            link_or_copy(cached_video, output_video_path)
+            return True
+        
         # Burn captions using FFmpeg
         success = burn_captions_ffmpeg(
             input_video_path,
@@ -301,8 +349,11 @@ def apply_captions_to_video(
             caption_style
         )
         
+        if success:
+            _store_burn(output_video_path, cached_video)
+        
         return success
         
     except Exception as e:
         print(f"❌ Failed to apply captions: {e}")
-        return False 
\ No newline at end of file
+        return False
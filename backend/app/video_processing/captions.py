@@ -3,8 +3,15 @@ Caption and hashtag generation processor.
 """
 
 import os
-import random
-from typing import List, Dict, Any
+import hashlib
+import sqlite3
+import functools
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import orjson
+from pydantic import BaseModel, ConfigDict
 
 # Try to import OpenAI, fallback gracefully
 try:
@@ -14,8 +21,148 @@ except ImportError:
     OPENAI_AVAILABLE = False
 
 
+CAPTION_TEMPLATES = [
+    "This will blow your mind! 🤯",
+    "You need to see this! 👀",
+    "Game changer right here! 🔥",
+    "This is incredible! ✨",
+    "Mind = blown! 💫",
+    "Wait for it... 🎯",
+    "This changes everything! 🚀",
+    "You won't believe this! 😱"
+]
+
+HASHTAG_SETS = [
+    ["#viral", "#mindblown", "#mustsee", "#incredible", "#wow"],
+    ["#gamechange", "#amazing", "#viral", "#trending", "#fire"],
+    ["#shocking", "#unbelievable", "#epic", "#viral", "#omg"],
+    ["#mindblowing", "#insane", "#viral", "#mustwatch", "#crazy"],
+    ["#incredible", "#amazing", "#viral", "#trending", "#wow"],
+    ["#epic", "#gamechange", "#viral", "#fire", "#insane"],
+    ["#shocking", "#mindblown", "#viral", "#amazing", "#wtf"],
+    ["#unreal", "#incredible", "#viral", "#epic", "#mindblowing"]
+]
+
+HOOK_TEMPLATES = [
+    "Wait until you see this...",
+    "This is about to get crazy!",
+    "You're not ready for this!",
+    "Plot twist incoming...",
+    "This will change your perspective!",
+    "Brace yourself for this one!",
+    "You'll never guess what happens!",
+    "This is pure gold!"
+]
+
+# Caption limits per platform; hashtag_count is the (min, max) number of hashtags to keep
+PLATFORM_CONFIGS = {
+    "tiktok": {
+        "max_caption_length": 150,
+        "hashtag_count": (3, 5),
+        "style": "trendy",
+        "hashtags": ["#fyp", "#viral", "#trending", "#foryou"]
+    },
+    "instagram": {
+        "max_caption_length": 125,
+        "hashtag_count": (5, 10),
+        "style": "aesthetic",
+        "hashtags": ["#reels", "#viral", "#trending", "#explore"]
+    },
+    "youtube": {
+        "max_caption_length": 100,
+        "hashtag_count": (2, 4),
+        "style": "searchable",
+        "hashtags": ["#shorts", "#viral", "#trending"]
+    }
+}
+
+# Shared generator for the mock and platform paths, seeded once per process
+_rng = np.random.default_rng()
+
+CAPTION_MODEL = "gpt-4o-mini"
+
+
+class CaptionOut(BaseModel):
+    """AI-generated caption content for one clip"""
+    # Strict structured outputs need every field required and no extra keys
+    model_config = ConfigDict(extra='forbid')
+    
+    index: int
+    title: str
+    caption: str
+    hashtags: List[str]
+    hook: str
+
+
+class CaptionBatchOut(BaseModel):
+    """The captions for every clip in one request"""
+    model_config = ConfigDict(extra='forbid')
+    
+    clips: List[CaptionOut]
+
+
+# The model is constrained to this schema, so the reply always parses
+CAPTION_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "clip_captions", "strict": True, "schema": CaptionBatchOut.model_json_schema()}
+}
+
+# AI captions keyed by clip content, reused across runs and retries
+CAPTION_CACHE_PATH = Path(os.getenv('CAPTION_CACHE_PATH', str(Path.home() / '.cache' / 'hackai' / 'captions.sqlite')))
+
+
+@functools.cache
+def _caption_cache() -> Optional[sqlite3.Connection]:
+    """Open the on-disk caption cache once per process (None if it can't be used)"""
+    try:
+        CAPTION_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(CAPTION_CACHE_PATH, timeout=5, isolation_level=None)
+        connection.execute("CREATE TABLE IF NOT EXISTS captions (key TEXT PRIMARY KEY, content BLOB NOT NULL)")
+        return connection
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️ Caption cache unavailable: {e}")
+        return None
+
+
+def _caption_cache_key(chunk: Dict[str, Any]) -> str:
+    """Hash everything the prompt says about a chunk (BLAKE2b: the fastest hash in hashlib)"""
+    key = f"{CAPTION_MODEL}\0{chunk['text']}\0{round(chunk.get('duration', 30), 1)}"
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def _cached_captions(keys: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Look up previously generated captions"""
+    connection = _caption_cache()
+    if connection is None or not keys:
+        return {}
+    try:
+        rows = connection.execute(
+            f"SELECT key, content FROM captions WHERE key IN ({','.join('?' * len(keys))})",
+            keys
+        ).fetchall()
+    except sqlite3.Error as e:
+        print(f"⚠️ Caption cache read failed: {e}")
+        return {}
+    return {key: orjson.loads(content) for key, content in rows}
+
+
+def _cache_captions(entries: Dict[str, Dict[str, Any]]) -> None:
+    """Store generated captions for later runs"""
+    connection = _caption_cache()
+    if connection is None or not entries:
+        return
+    try:
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO captions (key, content) VALUES (?, ?)",
+                [(key, orjson.dumps(content)) for key, content in entries.items()]
+            )
+    except sqlite3.Error as e:
+        print(f"⚠️ Caption cache write failed: {e}")
+
+
 def generate_captions_with_ai(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Generate captions using OpenAI API."""
+    """Generate captions using OpenAI API (one request for all chunks)."""
     if not OPENAI_AVAILABLE:
         raise Exception("openai package required. Install with: pip install openai")
     
@@ -24,115 +171,113 @@ def generate_captions_with_ai(chunks: List[Dict[str, Any]]) -> List[Dict[str, An
     if not api_key:
         raise Exception("OPENAI_API_KEY environment variable required")
     
-    client = openai.OpenAI(api_key=api_key)
+    if not chunks:
+        return []
+    
+    # Chunks captioned before (same text and duration) are served from the cache
+    keys = [_caption_cache_key(chunk) for chunk in chunks]
+    cached = _cached_captions(keys)
+    ai_content_by_index = {i: cached[key] for i, key in enumerate(keys) if key in cached}
+    if ai_content_by_index:
+        print(f"📦 Reusing cached AI captions for {len(ai_content_by_index)}/{len(chunks)} chunks")
+    
+    clips = [
+        {"index": i, "content": chunk['text'], "duration": round(chunk.get('duration', 30), 1)}
+        for i, chunk in enumerate(chunks)
+        if i not in ai_content_by_index
+    ]
+    if clips:
+        ai_content_by_index.update(_request_captions(api_key, clips, keys))
     
     enhanced_chunks = []
     
     for i, chunk in enumerate(chunks):
-        try:
-            # Create prompt for caption generation
-            prompt = f"""
-            Create an engaging social media caption for this video clip content:
-            
-            Content: "{chunk['text']}"
-            Duration: {chunk.get('duration', 30):.1f} seconds
-            
-            Generate:
-            1. A catchy title (max 8 words)
-            2. An engaging caption (max 150 characters) 
-            3. 5-8 relevant hashtags
-            4. A hook line to grab attention
-            
-            Format as JSON:
-            {{
-                "title": "...",
-                "caption": "...",
-                "hashtags": ["#tag1", "#tag2", ...],
-                "hook": "..."
-            }}
-            """
-            
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=300,
-                temperature=0.7
-            )
-            
-            # Parse the response
-            import json
-            ai_content = json.loads(response.choices[0].message.content)
-            
+        ai_content = ai_content_by_index.get(i)
+        if ai_content is None:
+            if ai_content_by_index:
+                print(f"AI caption generation returned nothing for chunk {i+1}")
+            # Fallback to mock generation for this chunk
+            chunk = generate_mock_caption(chunk, i)
+        else:
             # Add AI-generated content to chunk
             chunk['title'] = ai_content.get('title', chunk.get('title', f'Clip {i+1}'))
             chunk['caption'] = ai_content.get('caption', '')
             chunk['hashtags'] = ai_content.get('hashtags', [])
             chunk['hook'] = ai_content.get('hook', '')
-            
-        except Exception as e:
-            print(f"AI caption generation failed for chunk {i+1}: {e}")
-            # Fallback to mock generation for this chunk
-            chunk = generate_mock_caption(chunk, i)
         
         enhanced_chunks.append(chunk)
     
     return enhanced_chunks
 
 
-def generate_mock_captions(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Generate mock captions for demo purposes."""
+def _request_captions(api_key: str, clips: List[Dict[str, Any]], keys: List[str]) -> Dict[int, Dict[str, Any]]:
+    """Ask OpenAI for the captions of several clips in one request, caching what comes back"""
+    client = openai.OpenAI(api_key=api_key)
     
-    caption_templates = [
-        "This will blow your mind! 🤯",
-        "You need to see this! 👀",
-        "Game changer right here! 🔥",
-        "This is incredible! ✨",
-        "Mind = blown! 💫",
-        "Wait for it... 🎯",
-        "This changes everything! 🚀",
-        "You won't believe this! 😱"
-    ]
+    # Create prompt for caption generation, covering every clip in one round-trip
+    prompt = f"""
+    Create engaging social media captions for each of these video clips
+    (content and duration in seconds):
     
-    hashtag_sets = [
-        ["#viral", "#mindblown", "#mustsee", "#incredible", "#wow"],
-        ["#gamechange", "#amazing", "#viral", "#trending", "#fire"],
-        ["#shocking", "#unbelievable", "#epic", "#viral", "#omg"],
-        ["#mindblowing", "#insane", "#viral", "#mustwatch", "#crazy"],
-        ["#incredible", "#amazing", "#viral", "#trending", "#wow"],
-        ["#epic", "#gamechange", "#viral", "#fire", "#insane"],
-        ["#shocking", "#mindblown", "#viral", "#amazing", "#wtf"],
-        ["#unreal", "#incredible", "#viral", "#epic", "#mindblowing"]
-    ]
+    {orjson.dumps(clips).decode()}
     
-    hook_templates = [
-        "Wait until you see this...",
-        "This is about to get crazy!",
-        "You're not ready for this!",
-        "Plot twist incoming...",
-        "This will change your perspective!",
-        "Brace yourself for this one!",
-        "You'll never guess what happens!",
-        "This is pure gold!"
-    ]
+    For every clip generate:
+    1. A catchy title (max 8 words)
+    2. An engaging caption (max 150 characters) 
+    3. 5-8 relevant hashtags
+    4. A hook line to grab attention
+    
+    Return one entry per clip, keeping each clip's index.
+    """
+    
+    try:
+        response = client.chat.completions.create(
+            model=CAPTION_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            response_format=CAPTION_RESPONSE_FORMAT,
+            # The schema bounds each clip's entry, so a smaller budget per clip is enough
+            max_tokens=200 * len(clips),
+            temperature=0.7,
+            stream=False
+        )
+        
+        # Parse the response
+        ai_clips = CaptionBatchOut.model_validate(orjson.loads(response.choices[0].message.content)).clips
+        requested = {clip['index'] for clip in clips}
+        ai_content_by_index = {
+            ai_content.index: ai_content.model_dump()
+            for ai_content in ai_clips
+            if ai_content.index in requested
+        }
+    except Exception as e:
+        print(f"AI caption generation failed: {e}")
+        return {}
+    
+    _cache_captions({keys[i]: ai_content for i, ai_content in ai_content_by_index.items()})
+    return ai_content_by_index
+
+
+def generate_mock_captions(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Generate mock captions for demo purposes."""
+    
+    # One draw per template list for every chunk at once, instead of three random.choice calls per chunk
+    picks = _rng.integers(
+        0,
+        (len(CAPTION_TEMPLATES), len(HASHTAG_SETS), len(HOOK_TEMPLATES)),
+        size=(len(chunks), 3)
+    ).tolist()
     
     enhanced_chunks = []
     
-    for i, chunk in enumerate(chunks):
+    for i, (chunk, (caption_index, hashtag_index, hook_index)) in enumerate(zip(chunks, picks)):
         # Keep existing title or generate one
         if 'title' not in chunk:
             chunk['title'] = f"Viral Moment #{i+1}"
         
-        # Generate caption
-        caption_template = random.choice(caption_templates)
-        chunk['caption'] = caption_template
-        
-        # Generate hashtags
-        hashtag_set = random.choice(hashtag_sets)
-        chunk['hashtags'] = hashtag_set
-        
-        # Generate hook
-        hook = random.choice(hook_templates)
-        chunk['hook'] = hook
+        chunk['caption'] = CAPTION_TEMPLATES[caption_index]
+        # Copy so callers can edit a chunk's hashtags without touching the template
+        chunk['hashtags'] = list(HASHTAG_SETS[hashtag_index])
+        chunk['hook'] = HOOK_TEMPLATES[hook_index]
         
         enhanced_chunks.append(chunk)
     
@@ -147,31 +292,12 @@ def generate_mock_caption(chunk: Dict[str, Any], index: int) -> Dict[str, Any]:
 def generate_platform_optimized_captions(chunks: List[Dict[str, Any]], platform: str = "tiktok") -> List[Dict[str, Any]]:
     """Generate platform-specific optimized captions."""
     
-    platform_configs = {
-        "tiktok": {
-            "max_caption_length": 150,
-            "hashtag_count": 3-5,
-            "style": "trendy",
-            "hashtags": ["#fyp", "#viral", "#trending", "#foryou"]
-        },
-        "instagram": {
-            "max_caption_length": 125,
-            "hashtag_count": 5-10,
-            "style": "aesthetic",
-            "hashtags": ["#reels", "#viral", "#trending", "#explore"]
-        },
-        "youtube": {
-            "max_caption_length": 100,
-            "hashtag_count": 2-4,
-            "style": "searchable",
-            "hashtags": ["#shorts", "#viral", "#trending"]
-        }
-    }
-    
-    config = platform_configs.get(platform, platform_configs["tiktok"])
+    config = PLATFORM_CONFIGS.get(platform, PLATFORM_CONFIGS["tiktok"])
+    min_hashtags, max_hashtags = config['hashtag_count']
+    hashtag_counts = _rng.integers(min_hashtags, max_hashtags + 1, size=len(chunks)).tolist()
     
     optimized_chunks = []
-    for chunk in chunks:
+    for chunk, hashtag_count in zip(chunks, hashtag_counts):
         # Adjust caption length
         caption = chunk.get('caption', '')
         if len(caption) > config['max_caption_length']:
@@ -181,9 +307,9 @@ def generate_platform_optimized_captions(chunks: List[Dict[str, Any]], platform:
         hashtags = chunk.get('hashtags', [])
         platform_hashtags = config['hashtags']
         
-        # Combine and limit hashtags
-        all_hashtags = list(set(hashtags + platform_hashtags))
-        chunk['hashtags'] = all_hashtags[:config['hashtag_count']]
+        # Combine (deduplicated, chunk's own hashtags first) and limit hashtags
+        all_hashtags = list(dict.fromkeys(hashtags + platform_hashtags))
+        chunk['hashtags'] = all_hashtags[:hashtag_count]
         chunk['caption'] = caption
         chunk['platform'] = platform
         
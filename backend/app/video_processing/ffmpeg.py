@@ -0,0 +1,236 @@
+"""
+FFmpeg helpers for locating the binary and trimming clips.
+
+Only the standard library is needed here, so the API can import this module without
+pulling in the heavy pipeline dependencies.
+"""
+
+import os
+import bisect
+import shutil
+import functools
+import subprocess
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+# A cut this close to a keyframe is treated as keyframe-aligned
+KEYFRAME_TOLERANCE = 0.05
+
+# Checked when ffmpeg isn't on PATH (Apple Silicon Homebrew, Intel Homebrew, Linux)
+FFMPEG_FALLBACK_PATHS = ('/opt/homebrew/bin/ffmpeg', '/usr/local/bin/ffmpeg', '/usr/bin/ffmpeg')
+
+
+@functools.cache
+def ffmpeg_path() -> Optional[str]:
+    """Locate the system ffmpeg binary (resolved once per process)"""
+    return shutil.which('ffmpeg') or next((path for path in FFMPEG_FALLBACK_PATHS if os.path.exists(path)), None)
+
+
+@functools.cache
+def ffprobe_path() -> Optional[str]:
+    """Locate ffprobe, preferring the one installed next to the ffmpeg in use"""
+    ffmpeg = ffmpeg_path()
+    if ffmpeg:
+        sibling = os.path.join(os.path.dirname(ffmpeg), 'ffprobe')
+        if os.access(sibling, os.X_OK):
+            return sibling
+    return shutil.which('ffprobe')
+
+
+class VideoEncoder(NamedTuple):
+    """ffmpeg arguments for one H.264 encoder"""
+    name: str
+    input_args: Tuple[str, ...]  # Before -i (device setup)
+    filters: Tuple[str, ...]  # Appended to the filter chain (upload to the encoder's frames)
+    output_args: Tuple[str, ...]
+
+
+VAAPI_DEVICE = '/dev/dri/renderD128'
+
+# Hardware encoders in order of preference; frames are decoded and captioned on the
+# CPU (libass) and only the encode moves to the GPU/media engine
+HARDWARE_ENCODERS = (
+    VideoEncoder('h264_nvenc', (), (), ('-c:v', 'h264_nvenc', '-preset', 'p4', '-rc', 'vbr', '-cq', '23')),
+    VideoEncoder('h264_vaapi', ('-vaapi_device', VAAPI_DEVICE), ('format=nv12', 'hwupload'), ('-c:v', 'h264_vaapi', '-qp', '23')),
+    VideoEncoder('h264_videotoolbox', (), (), ('-c:v', 'h264_videotoolbox', '-b:v', '6M')),
+)
+
+SOFTWARE_ENCODER = VideoEncoder('libx264', (), (), ('-c:v', 'libx264', '-preset', 'fast', '-crf', '23'))
+
+
+def _encoder_works(encoder: VideoEncoder) -> bool:
+    """Encode a few blank frames to check the encoder's hardware is actually present"""
+    if encoder.name == 'h264_vaapi' and not os.path.exists(VAAPI_DEVICE):
+        return False
+    cmd = [
+        ffmpeg_path() or 'ffmpeg', '-nostdin', '-hide_banner', '-loglevel', 'error',
+        *encoder.input_args,
+        '-f', 'lavfi', '-i', 'color=black:s=256x256:d=0.1'
+    ]
+    if encoder.filters:
+        cmd += ['-vf', ','.join(encoder.filters)]
+    cmd += [*encoder.output_args, '-f', 'null', '-']
+    try:
+        return subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=15).returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+
+@functools.cache
+def video_encoder() -> VideoEncoder:
+    """Pick the H.264 encoder for re-encodes: the first working hardware encoder, else libx264 (probed once per process)"""
+    for encoder in HARDWARE_ENCODERS:
+        if _encoder_works(encoder):
+            print(f"⚡ Using hardware video encoder: {encoder.name}")
+            return encoder
+    return SOFTWARE_ENCODER
+
+
+# Concurrent NVENC sessions allowed on consumer GPUs
+NVENC_SESSION_LIMIT = 3
+
+
+def encode_workers() -> int:
+    """How many re-encodes to run at once without oversubscribing the CPU or the hardware encoder"""
+    # Each libx264 encode (and the decode + libass work in front of a hardware
+    # encode) keeps several cores busy, but two can still share a small host when
+    # callers split the cores between them with -threads
+    cpus = os.cpu_count() or 1
+    workers = max(min(cpus, 2), cpus // 4)
+    if video_encoder().name == 'h264_nvenc':
+        return min(workers, NVENC_SESSION_LIMIT)
+    return workers
+
+
+def encode_threads() -> int:
+    """x264 threads for each of encode_workers() concurrent encodes (0 lets x264 use every core)"""
+    workers = encode_workers()
+    return max(1, (os.cpu_count() or 1) // workers) if workers > 1 else 0
+
+
+def configure_ffmpeg_env() -> Optional[str]:
+    """Point moviepy/imageio at the system ffmpeg; must run before those libraries are imported"""
+    path = ffmpeg_path()
+    if path:
+        # This prevents Santa restrictions on bundled FFmpeg binaries
+        os.environ.update({
+            'USE_SYSTEM_FFMPEG': '1',
+            'IMAGEIO_FFMPEG_EXE': path,
+            'FFMPEG_BINARY': path,
+            'MOVIEPY_FFMPEG': path
+        })
+    return path
+
+
+def keyframe_times(video_path: str) -> Tuple[float, ...]:
+    """Return the keyframe timestamps of the first video stream, probing each file version once"""
+    try:
+        stat = os.stat(video_path)
+    except OSError:
+        return ()
+    # Keyed on mtime/size too, so a re-captioned file at the same path is probed again
+    return _probe_keyframes(video_path, stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=128)
+def _probe_keyframes(video_path: str, mtime_ns: int, size: int) -> Tuple[float, ...]:
+    """Scan the packets of the first video stream for keyframes (no decoding)"""
+    ffprobe = ffprobe_path()
+    if ffprobe is None:
+        print(f"⚠️ ffprobe not found, keyframes of {os.path.basename(video_path)} are unknown")
+        return ()
+    try:
+        result = subprocess.run(
+            [
+                ffprobe, '-v', 'error',
+                '-select_streams', 'v:0',
+                '-show_entries', 'packet=pts_time,flags',
+                '-of', 'csv=p=0',
+                video_path
+            ],
+            capture_output=True,
+            text=True
+        )
+    except OSError as e:
+        print(f"⚠️ ffprobe failed to run on {os.path.basename(video_path)}: {e}")
+        return ()
+    if result.returncode != 0:
+        print(f"⚠️ ffprobe failed on {os.path.basename(video_path)}: {result.stderr.strip()}")
+        return ()
+    
+    times = []
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(',')
+        if 'K' in flags and pts_time not in ('', 'N/A'):
+            times.append(float(pts_time))
+    # Packets come in decode order; keep the timestamps sorted for bisection
+    return tuple(sorted(times))
+
+
+def is_keyframe_aligned(start_time: float, keyframes: Sequence[float]) -> bool:
+    """Check whether a cut at start_time can be stream-copied without losing frames"""
+    if start_time < KEYFRAME_TOLERANCE:
+        return True
+    return any(abs(keyframe - start_time) <= KEYFRAME_TOLERANCE for keyframe in keyframes)
+
+
+def snap_to_keyframe(start_time: float, keyframes: Sequence[float]) -> float:
+    """Return the last keyframe at or before start_time (start_time itself if the keyframes are unknown)"""
+    if not keyframes:
+        return start_time
+    # Within tolerance of the next keyframe counts as on it, like is_keyframe_aligned
+    index = bisect.bisect_right(keyframes, start_time + KEYFRAME_TOLERANCE) - 1
+    return keyframes[index] if index >= 0 else 0.0
+
+
+def trim_command(
+    source: str,
+    output: str,
+    start_time: float,
+    duration: float,
+    stream_copy: bool,
+    threads: int = 0,
+    encoder: Optional[VideoEncoder] = None
+) -> List[str]:
+    """Build an ffmpeg trim command, seeking on the input so ffmpeg skips straight to the cut"""
+    # Re-encodes use libx264 unless a hardware encoder is passed in
+    hardware = None if stream_copy or encoder is None or encoder == SOFTWARE_ENCODER else encoder
+    cmd = [ffmpeg_path() or 'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error', '-nostats']
+    if hardware is not None:
+        cmd += hardware.input_args
+        if hardware.name == 'h264_nvenc':
+            # A trim applies no filters, so decode on the GPU too and keep frames in VRAM until NVENC
+            cmd += ['-hwaccel', 'cuda', '-hwaccel_output_format', 'cuda']
+    cmd += [
+        '-ss', f"{start_time:.3f}",
+        '-i', source,
+        '-t', f"{duration:.3f}"
+    ]
+    if stream_copy:
+        # Remux only: no decode/encode, timestamps shifted to start at zero
+        cmd += ['-c', 'copy', '-avoid_negative_ts', 'make_zero']
+    elif hardware is not None:
+        if hardware.filters:
+            cmd += ['-vf', ','.join(hardware.filters)]
+        cmd += [*hardware.output_args, '-c:a', 'aac']
+    else:
+        # Finalized clips are short previews, not archives: favour encode speed
+        # (threads=0 lets x264 pick; callers running several encodes split the cores)
+        cmd += ['-c:v', 'libx264', '-preset', 'ultrafast', '-crf', '23', '-threads', str(threads), '-c:a', 'aac']
+    # Put the moov atom first so the clip starts playing before it is fully downloaded
+    return cmd + ['-movflags', '+faststart', output]
+
+
+def batch_trim_command(source: str, cuts: Sequence[Tuple[str, float, float]]) -> List[str]:
+    """Build one ffmpeg command that stream-copies several (output, start, duration) cuts of the same source"""
+    cmd = [ffmpeg_path() or 'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error', '-nostats']
+    # Every cut gets its own input so ffmpeg seeks straight to it instead of reading
+    # the source from the beginning for each output
+    for _, start_time, duration in cuts:
+        cmd += ['-ss', f"{start_time:.3f}", '-t', f"{duration:.3f}", '-i', source]
+    for index, (output, _, _) in enumerate(cuts):
+        # Same streams ffmpeg picks by default for a single output: first video and audio
+        cmd += [
+            '-map', f"{index}:v:0?", '-map', f"{index}:a:0?",
+            '-c', 'copy', '-avoid_negative_ts', 'make_zero', '-movflags', '+faststart', output
+        ]
+    return cmd
@@ -3,90 +3,35 @@ Main video processing pipeline that integrates all components.
 """
 
 import os
+import re
 import sys
 import tempfile
 import shutil
 import time
-from typing import List, Dict
+import subprocess
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Tuple, Union
 from pathlib import Path
 
+import orjson
+
 # CRITICAL: Set FFmpeg environment variables BEFORE any video library imports
 # This prevents Santa restrictions on bundled FFmpeg binaries
-system_ffmpeg = shutil.which('ffmpeg')
+from .ffmpeg import (
+    SOFTWARE_ENCODER, batch_trim_command, configure_ffmpeg_env, encode_workers, ffmpeg_path, is_keyframe_aligned,
+    keyframe_times, trim_command, video_encoder
+)
+
+system_ffmpeg = configure_ffmpeg_env()
 if system_ffmpeg:
-    os.environ['USE_SYSTEM_FFMPEG'] = '1'
-    os.environ['IMAGEIO_FFMPEG_EXE'] = system_ffmpeg
     print(f"🎬 Pre-import FFmpeg config: {system_ffmpeg}")
-elif os.path.exists('/opt/homebrew/bin/ffmpeg'):
-    os.environ['USE_SYSTEM_FFMPEG'] = '1'
-    os.environ['IMAGEIO_FFMPEG_EXE'] = '/opt/homebrew/bin/ffmpeg'
-    print(f"🎬 Pre-import FFmpeg config: /opt/homebrew/bin/ffmpeg")
-elif os.path.exists('/usr/local/bin/ffmpeg'):
-    os.environ['USE_SYSTEM_FFMPEG'] = '1'
-    os.environ['IMAGEIO_FFMPEG_EXE'] = '/usr/local/bin/ffmpeg'
-    print(f"🎬 Pre-import FFmpeg config: /usr/local/bin/ffmpeg")
 
 from .transcribe import transcribe_video
 from .segments import detect_segments, score_segments
 from .captions import generate_captions
 
-# Try to import video processing dependencies
-try:
-    # MoviePy 2.x uses different import structure
-    try:
-        from moviepy import VideoFileClip
-        import moviepy.config as moviepy_config
-    except ImportError:
-        # Fallback for older MoviePy versions
-        from moviepy.editor import VideoFileClip
-        import moviepy.config as moviepy_config
-    
-    # Configure MoviePy to use system FFmpeg instead of bundled version
-    # This avoids Shopify Santa restrictions on bundled binaries
-    
-    # Check if forced to use system FFmpeg via environment variable
-    force_system_ffmpeg = os.getenv('USE_SYSTEM_FFMPEG', '').lower() in ('1', 'true', 'yes')
-    
-    # Try to find system FFmpeg installation
-    system_ffmpeg = shutil.which('ffmpeg')
-    
-    if system_ffmpeg and (force_system_ffmpeg or not os.getenv('MOVIEPY_BUNDLED_FFMPEG')):
-        print(f"🎬 Using system FFmpeg: {system_ffmpeg}")
-        moviepy_config.FFMPEG_BINARY = system_ffmpeg
-        # Also set environment variable to prevent imageio_ffmpeg from downloading
-        os.environ['IMAGEIO_FFMPEG_EXE'] = system_ffmpeg
-    else:
-        # Try common Homebrew locations
-        homebrew_paths = [
-            '/opt/homebrew/bin/ffmpeg',  # Apple Silicon Macs
-            '/usr/local/bin/ffmpeg',     # Intel Macs
-            '/usr/bin/ffmpeg'            # Linux systems
-        ]
-        
-        for path in homebrew_paths:
-            if os.path.exists(path):
-                print(f"🎬 Using FFmpeg at: {path}")
-                moviepy_config.FFMPEG_BINARY = path
-                os.environ['IMAGEIO_FFMPEG_EXE'] = path
-                system_ffmpeg = path
-                break
-    
-    if not system_ffmpeg:
-        print("⚠️ System FFmpeg not found. MoviePy will use bundled version (may trigger Santa)")
-        print("💡 Install FFmpeg with: brew install ffmpeg")
-        print("💡 Or set USE_SYSTEM_FFMPEG=1 environment variable")
-    
-    MOVIEPY_AVAILABLE = True
-except (ImportError, RuntimeError) as e:
-    print("🎭 MoviePy not available:", e)
-    if "Santa" in str(e) or "not approved" in str(e):
-        print("🚫 Shopify Santa detected! FFmpeg binary blocked.")
-        print("💡 Solutions:")
-        print("   1. Install system FFmpeg: brew install ffmpeg")
-        print("   2. Set environment variable: export USE_SYSTEM_FFMPEG=1")
-        print("   3. Contact IT about approving FFmpeg binary")
-    MOVIEPY_AVAILABLE = False
-
 try:
     import yt_dlp
     YT_DLP_AVAILABLE = True
@@ -191,26 +136,15 @@ def download_youtube_video(url: str, output_path: str) -> str:
         
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             print(f"🔍 Attempting download with enhanced options...")
-            # Try to extract info first
-            info = ydl.extract_info(url, download=False)
+            # Extract and download in one pass; the info dict says where the file landed
+            info = ydl.extract_info(url, download=True)
             print(f"✅ Successfully extracted video info: {info.get('title', 'Unknown')}")
-            
-            # Now download
-            ydl.download([url])
+            requested = info.get('requested_downloads') or [{}]
+            actual_path = requested[0].get('filepath') or ydl.prepare_filename(info)
             
         print(f"✅ Download successful")
-        
-        # Find the actual downloaded file
-        import glob
-        pattern = output_path.replace('%(ext)s', '*')
-        downloaded_files = glob.glob(pattern)
-        if downloaded_files:
-            actual_path = downloaded_files[0]
-            print(f"📁 Downloaded file: {actual_path}")
-            return actual_path
-        else:
-            print(f"⚠️ No files found matching pattern: {pattern}")
-            return output_path.replace('%(ext)s', 'mp4')
+        print(f"📁 Downloaded file: {actual_path}")
+        return actual_path
             
     except Exception as e:
         error_msg = str(e)
@@ -252,33 +186,134 @@ def download_youtube_video(url: str, output_path: str) -> str:
                 pass
 
 
-def create_video_clip(source_video: str, start_time: float, end_time: float, output_path: str) -> str:
+# Placeholder written instead of a clip when ffmpeg isn't installed
+_MOCK_CLIP_TEMPLATE = """MOCK VIDEO CLIP
+================
+
+Source: {source}
+Start Time: {start:.2f}s
+End Time: {end:.2f}s
+Duration: {duration:.2f}s
+
+This is a demo file. Install ffmpeg for real video clips.
+Install ffmpeg: brew install ffmpeg (Mac) or apt install ffmpeg (Ubuntu)
+"""
+
+
+def create_video_clip(
+    source_video: str,
+    start_time: float,
+    end_time: float,
+    output_path: str,
+    threads: int = 0,
+    encode_slots: Optional[threading.Semaphore] = None
+) -> str:
     """Create a video clip from the source video between start and end times."""
-    if not MOVIEPY_AVAILABLE:
+    if not ffmpeg_path():
         # Create a mock clip file for demo
         print(f"🎭 Creating mock clip file: {os.path.basename(output_path)}")
         with open(output_path.replace('.mp4', '_info.txt'), 'w') as f:
-            f.write(f"MOCK VIDEO CLIP\n")
-            f.write(f"================\n\n")
-            f.write(f"Source: {source_video}\n")
-            f.write(f"Start Time: {start_time:.2f}s\n")
-            f.write(f"End Time: {end_time:.2f}s\n")
-            f.write(f"Duration: {end_time - start_time:.2f}s\n\n")
-            f.write("This is a demo file. Install moviepy and ffmpeg for real video clips.\n")
-            f.write("Run: pip install moviepy\n")
-            f.write("Install ffmpeg: brew install ffmpeg (Mac) or apt install ffmpeg (Ubuntu)\n")
+            f.write(_MOCK_CLIP_TEMPLATE.format(
+                source=source_video, start=start_time, end=end_time, duration=end_time - start_time
+            ))
         return output_path.replace('.mp4', '_info.txt')
     
-    with VideoFileClip(source_video) as video:
-        # MoviePy 2.x uses 'subclipped' instead of 'subclip'
-        if hasattr(video, 'subclipped'):
-            clip = video.subclipped(start_time, end_time)
+    duration = end_time - start_time
+    # A cut on a keyframe is remuxed as-is; anything else has to be re-encoded to start on the right frame.
+    # Re-encodes go to the hardware encoder when there is one, with libx264 as the last resort
+    attempts = [None] if is_keyframe_aligned(start_time, keyframe_times(source_video)) else []
+    attempts += dict.fromkeys((video_encoder(), SOFTWARE_ENCODER))
+    
+    for encoder in attempts:
+        # Re-encodes wait for one of the caller's encode slots; remuxes never do
+        slot = encode_slots if encoder is not None and encode_slots is not None else contextlib.nullcontext()
+        with slot:
+            result = subprocess.run(
+                trim_command(source_video, output_path, start_time, duration, encoder is None, threads, encoder),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE
+            )
+        if result.returncode == 0:
+            return output_path
+        method = encoder.name if encoder else "copy"
+        print(f"⚠️ FFmpeg {method} failed for {os.path.basename(output_path)}: {result.stderr.decode(errors='replace')}")
+    
+    raise Exception(f"FFmpeg failed to cut clip {os.path.basename(output_path)}")
+
+
+def create_video_clips(source_video: str, cuts: List[Tuple[float, float, str]]) -> List[Union[str, Exception]]:
+    """Cut several (start, end, output) clips from one source; returns each clip's path or the error that stopped it."""
+    results: List[Union[str, Exception, None]] = [None] * len(cuts)
+    
+    # Cuts that start on a keyframe are all remuxed by a single ffmpeg process
+    keyframes = keyframe_times(source_video) if ffmpeg_path() else ()
+    aligned = [i for i, (start_time, _, _) in enumerate(cuts) if is_keyframe_aligned(start_time, keyframes)]
+    if ffmpeg_path() and len(aligned) > 1:
+        batch = [(cuts[i][2], cuts[i][0], cuts[i][1] - cuts[i][0]) for i in aligned]
+        result = subprocess.run(batch_trim_command(source_video, batch), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if result.returncode == 0:
+            for i in aligned:
+                results[i] = cuts[i][2]
         else:
-            # Fallback for older MoviePy versions
-            clip = video.subclip(start_time, end_time)
-        clip.write_videofile(output_path, codec='libx264', audio_codec='aac')
+            print(f"⚠️ Batched FFmpeg cut failed, cutting clips one at a time: {result.stderr.decode(errors='replace')}")
+    
+    # Everything else (and a failed batch) goes through the single-clip path, every cut
+    # at once: remuxes are I/O-bound and run freely, only re-encodes share the encode budget
+    pending = [i for i, result in enumerate(results) if result is None]
+    if not pending:
+        return results
+    reencodes = len(pending) - len(set(pending).intersection(aligned))
+    encoders = min(max(reencodes, 1), encode_workers())
+    encode_slots = threading.BoundedSemaphore(encoders)
+    # Split the cores between concurrent re-encodes so x264 threads don't oversubscribe
+    # (a lone encode keeps threads=0 and lets x264 use them all)
+    threads = max(1, (os.cpu_count() or 1) // encoders) if encoders > 1 else 0
+    with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+        futures = {
+            executor.submit(create_video_clip, source_video, *cuts[i], threads, encode_slots): i
+            for i in pending
+        }
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                results[futures[future]] = e
     
-    return output_path
+    return results
+
+
+# Info file written for each demo clip
+_DEMO_CLIP_TEMPLATE = f"""🎬 DEMO CLIP {{number}}: {{title}}
+{'=' * 50}
+
+📍 Time Range: {{start:.1f}}s - {{end:.1f}}s
+⏱️ Duration: {{duration:.1f}} seconds
+
+📝 Content:
+{{text}}
+
+📱 Caption: {{caption}}
+🏷️ Hashtags: {{hashtags}}
+
+🎯 Original URL: {{url}}
+💭 User Prompt: {{prompt}}
+
+ℹ️ This is a demo file showing what would be created.
+Install video dependencies for actual MP4 clips:
+• pip install yt-dlp openai-whisper
+• brew install ffmpeg (macOS) or apt install ffmpeg (Linux)
+"""
+
+# "create/make/generate <N>" as whole words, e.g. "Create 2 engaging clips"
+_TOP_K_PATTERN = re.compile(r'(?<!\S)(?:create|make|generate)\s+(\d+)(?!\S)', re.IGNORECASE | re.ASCII)
+
+
+def parse_top_k(prompt: str, default: int = 3) -> int:
+    """Read how many clips the prompt asks for."""
+    if "clip" not in prompt.lower():
+        return default
+    match = _TOP_K_PATTERN.search(prompt)
+    return int(match.group(1)) if match else default
 
 
 def create_demo_clips(job_id: str, url: str, prompt: str, output_dir: str) -> List[str]:
@@ -293,13 +328,7 @@ def create_demo_clips(job_id: str, url: str, prompt: str, output_dir: str) -> Li
     os.makedirs(clips_dir, exist_ok=True)
     
     # Parse prompt for number of clips
-    top_k = 3  # default
-    if "clip" in prompt.lower():
-        words = prompt.lower().split()
-        for i, word in enumerate(words):
-            if word.isdigit() and i > 0 and words[i-1] in ["create", "make", "generate"]:
-                top_k = int(word)
-                break
+    top_k = parse_top_k(prompt)
     
     demo_clips = [
         {
@@ -355,19 +384,18 @@ def create_demo_clips(job_id: str, url: str, prompt: str, output_dir: str) -> Li
         clip_path = os.path.join(clips_dir, clip_filename)
         
         with open(clip_path, 'w') as f:
-            f.write(f"🎬 DEMO CLIP {i+1}: {clip['title']}\n")
-            f.write(f"{'='*50}\n\n")
-            f.write(f"📍 Time Range: {clip['start']:.1f}s - {clip['end']:.1f}s\n")
-            f.write(f"⏱️ Duration: {clip['end'] - clip['start']:.1f} seconds\n\n")
-            f.write(f"📝 Content:\n{clip['text']}\n\n")
-            f.write(f"📱 Caption: {clip['caption']}\n")
-            f.write(f"🏷️ Hashtags: {' '.join(clip['hashtags'])}\n\n")
-            f.write(f"🎯 Original URL: {url}\n")
-            f.write(f"💭 User Prompt: {prompt}\n\n")
-            f.write("ℹ️ This is a demo file showing what would be created.\n")
-            f.write("Install video dependencies for actual MP4 clips:\n")
-            f.write("• pip install yt-dlp moviepy openai-whisper\n")
-            f.write("• brew install ffmpeg (macOS) or apt install ffmpeg (Linux)\n")
+            f.write(_DEMO_CLIP_TEMPLATE.format(
+                number=i + 1,
+                title=clip['title'],
+                start=clip['start'],
+                end=clip['end'],
+                duration=clip['end'] - clip['start'],
+                text=clip['text'],
+                caption=clip['caption'],
+                hashtags=' '.join(clip['hashtags']),
+                url=url,
+                prompt=prompt
+            ))
         
         # Store clip metadata (for demo mode)
         clip_info = {
@@ -392,7 +420,6 @@ def create_demo_clips(job_id: str, url: str, prompt: str, output_dir: str) -> Li
         print(f"✨ Created demo clip: {clip['title']}")
     
     # Save metadata to JSON file
-    import json
     metadata_path = os.path.join(job_output_dir, "metadata.json")
     job_metadata = {
         "job_id": job_id,
@@ -403,8 +430,8 @@ def create_demo_clips(job_id: str, url: str, prompt: str, output_dir: str) -> Li
         "created_at": str(time.time()),
         "is_demo": True
     }
-    with open(metadata_path, 'w') as f:
-        json.dump(job_metadata, f, indent=2)
+    with open(metadata_path, 'wb') as f:
+        f.write(orjson.dumps(job_metadata, option=orjson.OPT_INDENT_2))
     print(f"📝 Saved demo metadata to: {metadata_path}")
     
     return output_paths
@@ -426,10 +453,10 @@ def run_processing_pipeline(job_id: str, url: str, prompt: str, output_dir: str)
     print(f"💭 Prompt: {prompt}")
     
     # Check if we have all dependencies for full processing
-    has_full_deps = YT_DLP_AVAILABLE and MOVIEPY_AVAILABLE
+    # Clips are cut with ffmpeg directly
+    has_full_deps = YT_DLP_AVAILABLE and ffmpeg_path() is not None
 
     print("YT_DLP_AVAILABLE", YT_DLP_AVAILABLE  )
-    print("MOVIEPY_AVAILABLE", MOVIEPY_AVAILABLE)
     
     if not has_full_deps:
         print("⚠️ Missing video dependencies, creating demo clips...")
@@ -453,14 +480,11 @@ def run_processing_pipeline(job_id: str, url: str, prompt: str, output_dir: str)
         print(f"⬇️ Downloading video from {url}")
         video_filename = f"{job_id}_video.%(ext)s"
         video_path = os.path.join(temp_dir, video_filename)
-        downloaded_video = download_youtube_video(url, video_path)
-        
-        # Find the actual downloaded file (yt-dlp might change the extension)
-        downloaded_files = [f for f in os.listdir(temp_dir) if f.startswith(f"{job_id}_video")]
-        if not downloaded_files:
+        # yt-dlp picks the extension, so use the path it reports
+        actual_video_path = download_youtube_video(url, video_path)
+        if not os.path.isfile(actual_video_path):
             raise Exception("Failed to download video")
         
-        actual_video_path = os.path.join(temp_dir, downloaded_files[0])
         print(f"✅ Video downloaded: {actual_video_path}")
         
         # Step 2: Transcribe video
@@ -474,41 +498,41 @@ def run_processing_pipeline(job_id: str, url: str, prompt: str, output_dir: str)
         print(f"✅ Found {len(chunks)} potential chunks")
         
         # Parse the prompt to determine how many clips to create
-        top_k = 3  # default
-        if "clip" in prompt.lower():
-            words = prompt.lower().split()
-            for i, word in enumerate(words):
-                if word.isdigit() and i > 0 and words[i-1] in ["create", "make", "generate"]:
-                    top_k = int(word)
-                    break
+        top_k = parse_top_k(prompt)
         
         top_chunks = score_segments(chunks, top_k=top_k)
         print(f"🏆 Selected top {len(top_chunks)} chunks")
         
-        # Step 4: Generate captions
-        print(f"✨ Generating captions and hashtags...")
-        try:
-            captioned_chunks = generate_captions(top_chunks)
-            print(f"✅ Captions generated")
-        except Exception as e:
-            print(f"⚠️ Caption generation failed: {e}")
-            captioned_chunks = top_chunks
+        # Cuts only need the chunk times, so ffmpeg starts on them in the background
+        # while the caption request waits on the network
+        cuts = [
+            (chunk['start'], chunk['end'], os.path.join(clips_dir, f"clip_{i+1}.mp4"))
+            for i, chunk in enumerate(top_chunks)
+        ]
+        with ThreadPoolExecutor(max_workers=1) as cutter:
+            clips_future = cutter.submit(create_video_clips, actual_video_path, cuts)
+            
+            # Step 4: Generate captions
+            print(f"✨ Generating captions and hashtags...")
+            try:
+                captioned_chunks = generate_captions(top_chunks)
+                print(f"✅ Captions generated")
+            except Exception as e:
+                print(f"⚠️ Caption generation failed: {e}")
+                captioned_chunks = top_chunks
+            
+            # Step 5: Create video clips
+            print(f"🎬 Creating video clips...")
+            created_clips = clips_future.result()
         
-        # Step 5: Create video clips
-        print(f"🎬 Creating video clips...")
         clip_metadata = []
         
-        for i, chunk in enumerate(captioned_chunks):
+        for i, (chunk, created_clip) in enumerate(zip(captioned_chunks, created_clips)):
             clip_filename = f"clip_{i+1}.mp4"
-            clip_path = os.path.join(clips_dir, clip_filename)
             
             try:
-                created_clip = create_video_clip(
-                    actual_video_path,
-                    chunk['start'],
-                    chunk['end'],
-                    clip_path
-                )
+                if isinstance(created_clip, Exception):
+                    raise created_clip
                 
                 # Store clip metadata
                 clip_info = {
@@ -531,23 +555,25 @@ def run_processing_pipeline(job_id: str, url: str, prompt: str, output_dir: str)
                 print(f"❌ Failed to create clip {i+1}: {e}")
                 # Create info file instead
                 info_path = os.path.join(clips_dir, f"clip_{i+1}_error.txt")
+                lines = [
+                    f"Clip {i+1} Info:",
+                    f"Title: {chunk.get('title', 'Untitled')}",
+                    f"Start: {chunk['start']:.2f}s",
+                    f"End: {chunk['end']:.2f}s",
+                    f"Duration: {chunk['end'] - chunk['start']:.2f}s",
+                    f"Text: {chunk['text']}"
+                ]
+                if 'caption' in chunk:
+                    lines.append(f"Caption: {chunk['caption']}")
+                if 'hashtags' in chunk:
+                    lines.append(f"Hashtags: {' '.join(chunk['hashtags'])}")
+                lines.append(f"\nError: {e}\n")
                 with open(info_path, 'w') as f:
-                    f.write(f"Clip {i+1} Info:\n")
-                    f.write(f"Title: {chunk.get('title', 'Untitled')}\n")
-                    f.write(f"Start: {chunk['start']:.2f}s\n")
-                    f.write(f"End: {chunk['end']:.2f}s\n")
-                    f.write(f"Duration: {chunk['end'] - chunk['start']:.2f}s\n")
-                    f.write(f"Text: {chunk['text']}\n")
-                    if 'caption' in chunk:
-                        f.write(f"Caption: {chunk['caption']}\n")
-                    if 'hashtags' in chunk:
-                        f.write(f"Hashtags: {' '.join(chunk['hashtags'])}\n")
-                    f.write(f"\nError: {e}\n")
+                    f.write("\n".join(lines))
         
         # Save metadata to JSON file
         if clip_metadata:
             metadata_path = os.path.join(job_output_dir, "metadata.json")
-            import json
             job_metadata = {
                 "job_id": job_id,
                 "url": url,
@@ -556,8 +582,8 @@ def run_processing_pipeline(job_id: str, url: str, prompt: str, output_dir: str)
                 "clips": clip_metadata,
                 "created_at": str(time.time())
             }
-            with open(metadata_path, 'w') as f:
-                json.dump(job_metadata, f, indent=2)
+            with open(metadata_path, 'wb') as f:
+                f.write(orjson.dumps(job_metadata, option=orjson.OPT_INDENT_2))
             print(f"📝 Saved metadata to: {metadata_path}")
         
         print(f"🎉 Pipeline complete: {len(output_clips)} clips created")
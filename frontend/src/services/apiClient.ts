@@ -72,6 +72,10 @@ export interface GenerateCaptionsResponse {
   previewUrl?: string;
 }
 
+// Finalize runs in the background; poll for its result
+const FINALIZE_POLL_INTERVAL_MS = 1000;
+const FINALIZE_TIMEOUT_MS = 10 * 60 * 1000;
+
 // API service functions
 export const apiService = {
   /**
@@ -107,7 +111,7 @@ export const apiService = {
   },
 
   /**
-   * Finalize clips
+   * Finalize clips (queued on the server, polled until it finishes)
    */
   async finalizeClips(jobId: string, editedClips: any[]): Promise<FinalizeResponse> {
     const response = await fetch(`${API_BASE_URL}/finalize/${jobId}`, {
@@ -122,6 +126,28 @@ export const apiService = {
       throw new Error(`API Error: ${response.status} ${response.statusText}`);
     }
 
+    const deadline = Date.now() + FINALIZE_TIMEOUT_MS;
+    while (Date.now() < deadline) {
+      await new Promise((resolve) => setTimeout(resolve, FINALIZE_POLL_INTERVAL_MS));
+      const result = await this.getFinalizeStatus(jobId);
+      if (result.status !== 'processing') {
+        return result;
+      }
+    }
+
+    throw new Error('Finalizing clips timed out');
+  },
+
+  /**
+   * Get the status of a job's finalization
+   */
+  async getFinalizeStatus(jobId: string): Promise<FinalizeResponse> {
+    const response = await fetch(`${API_BASE_URL}/finalize/${jobId}`);
+
+    if (!response.ok) {
+      throw new Error(`API Error: ${response.status} ${response.statusText}`);
+    }
+
     return response.json();
   },
 